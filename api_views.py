@@ -0,0 +1,86 @@
+"""
+API views - precomputed JSON responses for the read-only web API
+
+Views are rebuilt on a schedule from data the bot already keeps (streaks,
+weekly totals, tracked solves), never per request, so a dashboard can poll as
+often as it likes without causing a single LeetCode or database call. Each view
+carries an ETag that only changes with its content, so unchanged polls get a
+bodyless 304.
+
+Views are published and served on the bot's event loop, so no locking is needed.
+"""
+import json
+import time
+import hashlib
+from email.utils import formatdate
+from aiohttp import web
+from metrics import CACHE_REQUESTS, register_gauge_callback
+
+API_MAX_AGE = 60  # seconds clients and proxies may reuse a response
+
+# (kind, key) -> {"etag": str, "body": bytes, "updated_at": float}
+_views = {}
+_built = {}   # kind -> unix time of the last rebuild
+
+
+def _etag(payload):
+    content = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + hashlib.sha1(content.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def publish(kind, views):
+    """Replace every view of a kind with {key: payload}.
+
+    Unchanged payloads keep their ETag and updated_at; keys missing from views
+    (a guild the bot left, an unregistered user) stop being served.
+    """
+    now = time.time()
+    fresh = {}
+    for key, payload in views.items():
+        etag = _etag(payload)
+        current = _views.get((kind, key))
+        if current is not None and current["etag"] == etag:
+            fresh[(kind, key)] = current
+            continue
+        body = json.dumps({**payload, "updated_at": int(now)}, default=str).encode("utf-8")
+        fresh[(kind, key)] = {"etag": etag, "body": body, "updated_at": now}
+
+    for view_key in [k for k in _views if k[0] == kind]:
+        del _views[view_key]
+    _views.update(fresh)
+    _built[kind] = now
+
+
+def _matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as proxies may add W/ to the tag they cached
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def respond(request, kind, key):
+    """Serve a view with ETag / If-None-Match and Cache-Control"""
+    if kind not in _built:
+        return web.json_response({"error": "starting up, try again shortly"}, status=503, headers={"Retry-After": "30"})
+
+    view = _views.get((kind, key))
+    if view is None:
+        CACHE_REQUESTS.inc(cache="api", result="miss")
+        return web.json_response({"error": "not found"}, status=404)
+
+    headers = {
+        "ETag": view["etag"],
+        "Cache-Control": f"public, max-age={API_MAX_AGE}",
+        "Last-Modified": formatdate(view["updated_at"], usegmt=True),
+        "Access-Control-Allow-Origin": "*",
+    }
+    if _matches(request.headers.get("If-None-Match"), view["etag"]):
+        CACHE_REQUESTS.inc(cache="api", result="not_modified")
+        return web.Response(status=304, headers=headers)
+
+    CACHE_REQUESTS.inc(cache="api", result="hit")
+    return web.Response(body=view["body"], content_type="application/json", headers=headers)
+
+
+register_gauge_callback("api_views", "Precomputed API responses held in memory", lambda: len(_views))
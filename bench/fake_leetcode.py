@@ -0,0 +1,252 @@
+"""
+Fake LeetCode GraphQL server for load tests
+
+Answers the queries leetcode_logic sends with deterministic synthetic data
+(every username gets the same submissions on every run), with configurable
+latency, error rate and 429 rate. Point the bot at it with
+LEETCODE_GRAPHQL_URL=http://127.0.0.1:<port>/graphql.
+
+    python bench/fake_leetcode.py --port 8765 --latency 0.05 --error-rate 0.01
+
+GET /stats returns request counts per query type; GET /reset clears them.
+"""
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+PROBLEM_COUNT = 3000
+RECENT_LIMIT = 20
+
+
+class FakeLeetCodeConfig:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0, seed=1):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+
+    def roll(self):
+        with self.random_lock:
+            return self.random.random(), self.random.uniform(-self.jitter, self.jitter)
+
+
+class FakeLeetCodeStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = {}
+            self.errors = 0
+            self.rate_limited = 0
+
+    def record(self, query_type, outcome):
+        with self.lock:
+            self.requests[query_type] = self.requests.get(query_type, 0) + 1
+            if outcome == "error":
+                self.errors += 1
+            elif outcome == "rate_limited":
+                self.rate_limited += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": dict(self.requests),
+                "total": sum(self.requests.values()),
+                "errors": self.errors,
+                "rate_limited": self.rate_limited,
+            }
+
+
+# ---------- synthetic data ----------
+
+def _seed(*parts):
+    return int(hashlib.md5(":".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:8], 16)
+
+
+def problem(number):
+    number = (number - 1) % PROBLEM_COUNT + 1
+    return {
+        "questionFrontendId": str(number),
+        "title": f"Problem {number}",
+        "titleSlug": f"problem-{number}",
+        "difficulty": DIFFICULTIES[number % 3],
+        "topicTags": [{"name": "Array"}, {"name": "Hash Table"}],
+        "content": f"<p>Solve <strong>problem {number}</strong>.</p><pre>\nInput: nums = [1,2]\nOutput: 3\n</pre>",
+        "likes": number * 7 % 5000,
+        "dislikes": number * 3 % 800,
+        "acRate": 40 + number % 50,
+        "stats": "{}",
+        "hints": [],
+    }
+
+
+def _slug_number(title_slug):
+    try:
+        return int(title_slug.rsplit("-", 1)[1])
+    except (IndexError, ValueError):
+        return 1
+
+
+def user_submissions(username, now=None):
+    """A user's submissions, newest first: a few from today and older ones going back weeks"""
+    # Anchor to the hour so repeated polls within a run see the same timestamps
+    anchor = int(now or time.time()) // 3600 * 3600
+    rng = random.Random(_seed(username, anchor))
+    submissions = []
+    timestamp = anchor - rng.randint(60, 3600)
+    for _ in range(60):
+        number = rng.randint(1, PROBLEM_COUNT)
+        submissions.append({
+            "title": f"Problem {number}",
+            "titleSlug": f"problem-{number}",
+            "timestamp": str(timestamp),
+            "statusDisplay": "Accepted" if rng.random() < 0.6 else "Wrong Answer",
+        })
+        timestamp -= rng.randint(600, 6 * 3600)
+    return submissions
+
+
+def user_stats(username):
+    rng = random.Random(_seed(username))
+    counts = {d: rng.randint(0, 400) for d in DIFFICULTIES}
+    return {
+        "username": username,
+        "submitStatsGlobal": {
+            "acSubmissionNum": [{"difficulty": "All", "count": sum(counts.values())}]
+            + [{"difficulty": d, "count": c} for d, c in counts.items()]
+        },
+        "profile": {"ranking": rng.randint(1, 800000), "reputation": rng.randint(0, 100)},
+    }
+
+
+def resolve(query, variables):
+    """Return (query type, GraphQL data) for a request body"""
+    variables = variables or {}
+    if "activeDailyCodingChallengeQuestion" in query:
+        day = time.strftime("%Y-%m-%d", time.gmtime())
+        number = _seed(day) % PROBLEM_COUNT + 1
+        return "activeDailyCodingChallengeQuestion", {"activeDailyCodingChallengeQuestion": {
+            "date": day,
+            "link": f"/problems/problem-{number}/",
+            "question": problem(number),
+        }}
+    if "questionList" in query:
+        keywords = (variables.get("filters") or {}).get("searchKeywords", "1")
+        number = int(keywords) if str(keywords).isdigit() else 1
+        return "questionList", {"problemsetQuestionList": {"questions": [problem(number)]}}
+    if "question(" in query:
+        return "question", {"question": problem(_slug_number(variables.get("titleSlug", "")))}
+    if "recentAcSubmissionList" in query:
+        limit = 100
+        if "limit: 500" in query:
+            limit = 500
+        accepted = [
+            {k: s[k] for k in ("title", "titleSlug", "timestamp")}
+            for s in user_submissions(variables.get("username", ""))
+            if s["statusDisplay"] == "Accepted"
+        ]
+        return "recentAcSubmissionList", {"recentAcSubmissionList": accepted[:limit]}
+    if "recentSubmissionList" in query:
+        submissions = user_submissions(variables.get("username", ""))[:RECENT_LIMIT]
+        return "recentSubmissionList", {"recentSubmissionList": submissions}
+    if "matchedUser" in query:
+        return "matchedUser", {"matchedUser": user_stats(variables.get("username", ""))}
+    return "unknown", None
+
+
+# ---------- server ----------
+
+def make_handler(config, stats):
+    class FakeLeetCodeHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status, body, headers=None):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._reply(200, stats.snapshot())
+            elif self.path == "/reset":
+                stats.reset()
+                self._reply(200, {"ok": True})
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._reply(400, {"errors": [{"message": "invalid JSON"}]})
+                return
+
+            query_type, data = resolve(body.get("query", ""), body.get("variables"))
+            roll, jitter = config.roll()
+            delay = max(0.0, config.latency + jitter)
+            if delay:
+                time.sleep(delay)
+
+            if roll < config.rate_limit_rate:
+                stats.record(query_type, "rate_limited")
+                self._reply(429, {"errors": [{"message": "Too Many Requests"}]}, {"Retry-After": "1"})
+            elif roll < config.rate_limit_rate + config.error_rate:
+                stats.record(query_type, "error")
+                self._reply(500, {"errors": [{"message": "Internal Server Error"}]})
+            else:
+                stats.record(query_type, "ok")
+                self._reply(200, {"data": data})
+
+    return FakeLeetCodeHandler
+
+
+def start_server(config, port=0, host="127.0.0.1"):
+    """Start the fake server in a background thread; returns (server, stats, url)"""
+    stats = FakeLeetCodeStats()
+    server = ThreadingHTTPServer((host, port), make_handler(config, stats))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://{host}:{server.server_address[1]}/graphql"
+    return server, stats, url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake LeetCode GraphQL server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    args = parser.parse_args()
+
+    config = FakeLeetCodeConfig(args.latency, args.jitter, args.error_rate, args.rate_limit_rate)
+    server, stats, url = start_server(config, args.port, args.host)
+    print(f"Fake LeetCode GraphQL server listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
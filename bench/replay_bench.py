@@ -0,0 +1,137 @@
+"""
+Replay benchmark - runs the bot's jobs against recorded LeetCode traffic
+
+Replays a fixture recorded with LEETCODE_RECORD (see leetcode_replay.py)
+against the current leetcode_logic and main.py, for the LeetCode users that
+appear in it, and reports wall time and requests per query for each scenario.
+Save a run with --out and compare a later version against it with --compare.
+
+    python bench/replay_bench.py traffic.jsonl.gz --out before.json
+    python bench/replay_bench.py traffic.jsonl.gz --compare before.json
+
+Jobs decide what "today" is from the clock, so each run shifts datetime.now()
+in the bot's modules back to when the fixture was recorded (fixtures recorded
+before records carried a "time" replay against today's date).
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from run_bench import SCENARIOS, FakeChannel, import_bot, reset_state, run_scenario
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay recorded LeetCode traffic against the bot's jobs")
+    parser.add_argument("fixture", help="gzip JSON-lines fixture written with LEETCODE_RECORD")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of " + ",".join(SCENARIOS))
+    parser.add_argument("--timing", choices=["recorded", "none"], default="recorded",
+                        help="sleep each response's recorded latency, or answer instantly")
+    parser.add_argument("--budget-rpm", type=int, default=1_000_000,
+                        help="LeetCode request budget per minute (the bot default is 120)")
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to diff against")
+    return parser.parse_args()
+
+
+def fixture_registry(path):
+    """A registry with one Discord ID per LeetCode username found in the fixture"""
+    from leetcode_replay import load_fixture
+
+    usernames = []
+    for record in load_fixture(path):
+        username = ((record.get("request") or {}).get("variables") or {}).get("username")
+        if username and username not in usernames:
+            usernames.append(username)
+    return {str(1_000_000 + i): username for i, username in enumerate(usernames)}
+
+
+async def run_all(bot, registry, scenarios):
+    from leetcode_replay import get_replay_stats, reset_replay
+
+    results = {}
+    for scenario in scenarios:
+        reset_state(bot, registry, FakeChannel())
+        reset_replay()
+
+        started = time.perf_counter()
+        await run_scenario(bot, scenario, registry)
+        elapsed = time.perf_counter() - started
+
+        stats = get_replay_stats()
+        results[scenario] = {
+            "seconds": round(elapsed, 3),
+            "requests": sum(stats["queries"].values()),
+            "misses": stats["misses"],
+            "queries": stats["queries"],
+        }
+    return results
+
+
+def print_results(results, baseline=None):
+    header = f"{'scenario':<18}{'query':<34}{'value':>10}{'baseline':>10}{'delta':>8}"
+    print(header)
+    print("-" * len(header))
+    for scenario, result in results.items():
+        before = (baseline or {}).get(scenario, {})
+        rows = [("(wall time s)", result["seconds"], before.get("seconds")),
+                ("(total requests)", result["requests"], before.get("requests")),
+                ("(fixture misses)", result["misses"], before.get("misses"))]
+        for query in sorted(set(result["queries"]) | set(before.get("queries", {}))):
+            rows.append((query, result["queries"].get(query, 0), before.get("queries", {}).get(query)))
+
+        for name, value, old in rows:
+            line = f"{scenario:<18}{name:<34}{value:>10}"
+            if baseline is not None:
+                old_text = "-" if old is None else old
+                delta = "" if old is None else f"{value - old:+.3g}"
+                line += f"{old_text:>10}{delta:>8}"
+            print(line)
+
+
+def main():
+    args = parse_args()
+    fixture = os.path.abspath(args.fixture)
+    out = os.path.abspath(args.out) if args.out else None
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    os.environ["LEETCODE_REPLAY"] = fixture
+    os.environ["LEETCODE_REPLAY_TIMING"] = args.timing
+    os.environ.pop("LEETCODE_RECORD", None)
+    registry = fixture_registry(fixture)
+    bot = import_bot(budget_rpm=args.budget_rpm)
+    bot.SUBMISSION_POLL_DELAY = 0
+
+    import storage
+    import leetcode_logic
+    from datetime import datetime
+    from leetcode_replay import load_fixture, fixture_started_at, shift_clock
+
+    print(f"Replaying {fixture} for {len(registry)} LeetCode users (timing: {args.timing})")
+    started_at = fixture_started_at(load_fixture(fixture))
+    if started_at is None:
+        print("Fixture has no recording times; replaying against today's date")
+    else:
+        shift_clock([bot, leetcode_logic, storage], started_at)
+        print(f"Clock shifted to {datetime.fromtimestamp(started_at):%Y-%m-%d %H:%M:%S} (recording start)")
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    results = asyncio.run(run_all(bot, registry, scenarios))
+    print_results(results, baseline)
+
+    if out:
+        with open(out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
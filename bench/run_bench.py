@@ -0,0 +1,144 @@
+"""
+Benchmark runner - drives the bot's hot paths against the fake LeetCode server
+
+Runs submission_check_job, streak_update and the !leaderboard builder for
+synthetic registries of each size and reports cycle time and LeetCode
+requests per cycle. Nothing talks to Discord, MongoDB or leetcode.com: the
+bot runs with JSON storage in a temporary directory and fake channels.
+
+    python bench/run_bench.py --users 100,1000,10000 --latency 0.02
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fake_leetcode import FakeLeetCodeConfig, start_server
+
+SCENARIOS = ["submission_check", "streak_update", "leaderboard"]
+BENCH_GUILD_ID = "bench-guild"
+
+
+class FakeChannel:
+    """Stands in for a discord.TextChannel; counts what would have been sent"""
+
+    def __init__(self, channel_id=1):
+        self.id = channel_id
+        self.sent = 0
+
+    async def send(self, content=None, **kwargs):
+        self.sent += 1
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the bot against a fake LeetCode server")
+    parser.add_argument("--users", default="100,1000,10000", help="comma-separated registry sizes")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of " + ",".join(SCENARIOS))
+    parser.add_argument("--cycles", type=int, default=1, help="runs per scenario and size")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake LeetCode latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--budget-rpm", type=int, default=1_000_000,
+                        help="LeetCode request budget per minute (the bot default is 120)")
+    parser.add_argument("--poll-delay", type=float, default=0.0,
+                        help="SUBMISSION_POLL_DELAY override (the bot default is 0.5s)")
+    return parser.parse_args()
+
+
+def import_bot(url=None, budget_rpm=None):
+    """Import main (against the fake server, if given) with throwaway JSON storage"""
+    if url is not None:
+        os.environ["LEETCODE_GRAPHQL_URL"] = url
+    if budget_rpm is not None:
+        os.environ["LEETCODE_REQUESTS_PER_MINUTE"] = str(budget_rpm)
+    # An empty URI wins over .env, so storage falls back to JSON files
+    os.environ["MONGODB_URI"] = ""
+    workdir = tempfile.mkdtemp(prefix="leettogether-bench-")
+    os.environ["TRACE_LOG_PATH"] = os.path.join(workdir, "traces.jsonl")
+    os.chdir(workdir)
+
+    import main
+    return main
+
+
+def synthetic_registry(users):
+    return {str(1_000_000 + i): f"benchuser{i}" for i in range(users)}
+
+
+def reset_state(bot, registry, channel):
+    """Load a registry and forget everything cached from the last run"""
+    from leetcode_cache import clear_read_cache
+    from command_cache import clear_cache
+
+    bot.user_registry.clear()
+    bot.user_registry.update(registry)
+    bot.streak_registry.clear()
+    clear_read_cache()
+    clear_cache()
+    for path in ("hourly_announcements.json", "streak.json", "weekly.json", "outbox.json"):
+        if os.path.exists(path):
+            os.remove(path)
+    bot.get_report_scopes = lambda: [(BENCH_GUILD_ID, channel, registry)]
+    return registry
+
+
+async def run_scenario(bot, scenario, registry):
+    if scenario == "submission_check":
+        await bot.submission_check_job()
+    elif scenario == "streak_update":
+        await bot.streak_update()
+    elif scenario == "leaderboard":
+        await bot.build_leaderboard_lines(BENCH_GUILD_ID, registry)
+    else:
+        raise ValueError(f"unknown scenario {scenario}")
+
+
+async def run_all(bot, stats, sizes, scenarios, cycles):
+    for users in sizes:
+        for scenario in scenarios:
+            for _ in range(cycles):
+                channel = FakeChannel()
+                registry = reset_state(bot, synthetic_registry(users), channel)
+                stats.reset()
+
+                started = time.perf_counter()
+                await run_scenario(bot, scenario, registry)
+                elapsed = time.perf_counter() - started
+
+                counts = stats.snapshot()
+                print(
+                    f"{scenario:<18}{users:>8}{elapsed:>12.2f}{counts['total']:>10}"
+                    f"{counts['total'] / users:>10.2f}{counts['errors']:>8}{counts['rate_limited']:>8}{channel.sent:>8}"
+                )
+
+
+def main():
+    args = parse_args()
+    sizes = [int(n) for n in args.users.split(",") if n]
+    scenarios = [s for s in args.scenarios.split(",") if s]
+
+    config = FakeLeetCodeConfig(args.latency, args.jitter, args.error_rate, args.rate_limit_rate)
+    server, stats, url = start_server(config)
+    bot = import_bot(url, args.budget_rpm)
+    bot.SUBMISSION_POLL_DELAY = args.poll_delay
+
+    print(f"Fake LeetCode at {url} (latency {args.latency}s, errors {args.error_rate:.0%}, 429s {args.rate_limit_rate:.0%})")
+    header = f"{'scenario':<18}{'users':>8}{'cycle (s)':>12}{'requests':>10}{'req/user':>10}{'errors':>8}{'429s':>8}{'sends':>8}"
+    print(header)
+    print("-" * len(header))
+
+    # One event loop for every run, since the bot keeps loop-bound locks in module state
+    asyncio.run(run_all(bot, stats, sizes, scenarios, args.cycles))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
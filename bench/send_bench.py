@@ -0,0 +1,322 @@
+"""
+Discord send-path load test - safe_send and chunk_messages against fake channels
+
+Fake channels and users stand in for Discord: every send takes a configurable
+latency, the fake enforces Discord's per-channel (5 per 5s) and global (50/s)
+limits, and extra 429s can be scripted at a given rate with a given
+retry_after. The real announcement (outbox), nudge and recap paths run on top
+and the runner reports throughput, safe_send tail latency and retry
+amplification (send attempts per delivered message). It also checks that every
+message was delivered exactly once and in order per channel.
+
+    python bench/send_bench.py --scenarios announce,nudge,recap --users 500 --channels 20
+    python bench/send_bench.py --rate-limit-rate 0.2 --retry-after 1.5   # 429 storm
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import contextlib
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import discord
+from run_bench import import_bot
+
+SCENARIOS = ["announce", "nudge", "recap"]
+CHANNEL_BURST = 5
+CHANNEL_WINDOW = 5.0
+GLOBAL_PER_SECOND = 50
+DRAIN_TIMEOUT = 600
+
+
+class FakeResponse:
+    def __init__(self, status, reason, headers):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+
+
+def rate_limited_error(retry_after, is_global=False):
+    """A 429 shaped like the one discord.py raises"""
+    headers = {
+        "X-RateLimit-Reset-After": f"{retry_after:.3f}",
+        "X-RateLimit-Limit": str(CHANNEL_BURST),
+        "X-RateLimit-Scope": "global" if is_global else "user",
+    }
+    if is_global:
+        headers["X-RateLimit-Global"] = "true"
+    message = {"message": "You are being rate limited.", "retry_after": retry_after, "global": is_global}
+    return discord.errors.HTTPException(FakeResponse(429, "Too Many Requests", headers), message)
+
+
+class FakeDiscord:
+    """Server side of the fake: latency, Discord's rate limits and scripted 429s"""
+
+    def __init__(self, latency=0.05, jitter=0.0, rate_limit_rate=0.0, retry_after=1.0,
+                 global_rate=0.0, enforce_limits=True, seed=1):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.global_rate = global_rate
+        self.enforce_limits = enforce_limits
+        self.random = random.Random(seed)
+        self.reset()
+
+    def reset(self):
+        self.attempts = 0
+        self.rate_limited = 0
+        self.delivered = {}
+        self._buckets = {}
+        self._global_window = (0.0, 0)
+
+    def _check_limits(self, channel_id, now):
+        """Return (retry_after, is_global) if this request would be rejected, else None"""
+        roll = self.random.random()
+        if roll < self.rate_limit_rate:
+            return self.retry_after, roll < self.rate_limit_rate * self.global_rate
+        if not self.enforce_limits:
+            return None
+
+        window_start, count = self._global_window
+        if now - window_start >= 1.0:
+            window_start, count = now, 0
+        if count >= GLOBAL_PER_SECOND:
+            return window_start + 1.0 - now, True
+        self._global_window = (window_start, count + 1)
+
+        remaining, reset_at = self._buckets.get(channel_id, (CHANNEL_BURST, 0.0))
+        if now >= reset_at:
+            remaining, reset_at = CHANNEL_BURST, now + CHANNEL_WINDOW
+        if remaining <= 0:
+            return reset_at - now, False
+        self._buckets[channel_id] = (remaining - 1, reset_at)
+        return None
+
+    async def send(self, channel_id, content):
+        self.attempts += 1
+        delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+        if delay:
+            await asyncio.sleep(delay)
+        rejected = self._check_limits(channel_id, time.monotonic())
+        if rejected is not None:
+            self.rate_limited += 1
+            raise rate_limited_error(*rejected)
+        self.delivered.setdefault(channel_id, []).append(content)
+
+
+class FakeChannel:
+    """Stands in for a text or DM channel"""
+
+    def __init__(self, channel_id, server):
+        self.id = channel_id
+        self.server = server
+
+    async def send(self, content=None, **kwargs):
+        await self.server.send(self.id, content)
+
+
+class FakeUser:
+    """Stands in for a discord.User: DMs go through a lazily created DM channel"""
+
+    def __init__(self, user_id, server):
+        self.id = user_id
+        self.server = server
+        self.dm_channel = None
+
+    async def create_dm(self):
+        # DM channel IDs are distinct from user IDs, as on Discord
+        self.dm_channel = FakeChannel(self.id + 10**12, self.server)
+        return self.dm_channel
+
+    async def send(self, content=None, **kwargs):
+        channel = self.dm_channel or await self.create_dm()
+        await channel.send(content, **kwargs)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the Discord send path with fake channels")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of " + ",".join(SCENARIOS))
+    parser.add_argument("--users", type=int, default=200, help="registered users (announcements and nudges)")
+    parser.add_argument("--channels", type=int, default=10, help="announcement channels / recap guilds")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per fake Discord request")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of sends answered with a scripted 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="retry_after on scripted 429s")
+    parser.add_argument("--global-rate", type=float, default=0.0, help="fraction of scripted 429s that are global")
+    parser.add_argument("--no-limits", action="store_true", help="don't enforce Discord's per-channel and global limits")
+    parser.add_argument("--verbose", action="store_true", help="show the bot's own log output")
+    return parser.parse_args()
+
+
+def timed_safe_send(bot, latencies, failures):
+    """Wrap main.safe_send to record each call's end-to-end latency, queueing included"""
+    safe_send = bot.safe_send
+
+    async def wrapper(send_callable, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await safe_send(send_callable, *args, **kwargs)
+        except Exception:
+            failures.append(1)
+            raise
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    return wrapper
+
+
+def reset_send_state(bot):
+    bot._rate_limit_state["buckets"].clear()
+    bot._rate_limit_state["global_next_allowed"] = 0.0
+    for path in ("outbox.json", "dm_channels.json"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def announcement(i):
+    return (
+        f"✅ <@{1_000_000 + i}> (**benchuser{i}**) solved **{i % 3000 + 1}. Problem {i % 3000 + 1}** "
+        f"🟡 Medium\n🔗 https://leetcode.com/problems/problem-{i % 3000 + 1}/"
+    )
+
+
+async def run_announce(bot, server, users, channels):
+    """Chunk per-channel announcements into the outbox and let the drain task send them"""
+    fake_channels = {9000 + c: FakeChannel(9000 + c, server) for c in range(channels)}
+    expected = {}
+    for channel_id in fake_channels:
+        messages = [announcement(i) for i in range(users) if 9000 + i % channels == channel_id]
+        for chunk in bot.chunk_messages(messages):
+            bot.enqueue_outbox(channel_id, chunk)
+            expected.setdefault(channel_id, []).append(chunk)
+
+    bot.bot.get_channel = fake_channels.get
+    total = sum(len(chunks) for chunks in expected.values())
+    drain = asyncio.create_task(bot.outbox_drain_loop())
+    try:
+        deadline = time.monotonic() + DRAIN_TIMEOUT
+        while bot.count_pending_outbox() and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+    finally:
+        drain.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await drain
+    return expected, total
+
+
+async def run_nudge(bot, server, users):
+    """Run smart_nudge_job with nobody solved, so every user gets a DM"""
+    fake_users = {1_000_000 + i: FakeUser(1_000_000 + i, server) for i in range(users)}
+    bot.user_registry.clear()
+    bot.user_registry.update({str(user_id): f"benchuser{i}" for i, user_id in enumerate(fake_users)})
+    bot.load_announcements = lambda: {}
+    bot.sync_user_submissions = lambda discord_id, username: False
+    bot.bot.get_user = fake_users.get
+
+    await bot.smart_nudge_job()
+    expected = {user.id + 10**12: [bot.NUDGE_MESSAGE] for user in fake_users.values()}
+    return expected, users
+
+
+async def run_recap(bot, server, users, channels):
+    """Post the weekly recap to every guild's channel"""
+    scopes = []
+    expected = {}
+    for c in range(channels):
+        registry = {str(1_000_000 + i): f"benchuser{i}" for i in range(users) if i % channels == c}
+        scopes.append((f"guild-{c}", FakeChannel(9000 + c, server), registry))
+        expected[9000 + c] = None
+    bot.streak_registry.clear()
+    for i in range(users):
+        bot.streak_registry[str(1_000_000 + i)] = {"streak": i % 30, "longest_streak": i % 45, "total_days_solved": i % 200}
+    bot.get_report_scopes = lambda: scopes
+
+    await bot.weekly_recap_job()
+    return expected, channels
+
+
+def check_delivery(server, expected):
+    """Count messages lost, duplicated or out of order against what each channel should have got"""
+    lost = duplicated = out_of_order = 0
+    for channel_id, want in expected.items():
+        got = server.delivered.get(channel_id, [])
+        if want is None:
+            # Only the count is known up front (one recap per channel)
+            lost += max(0, 1 - len(got))
+            duplicated += max(0, len(got) - 1)
+            continue
+        lost += sum(1 for message in want if message not in got)
+        duplicated += max(0, len(got) - len(set(got)))
+        if [m for m in got if m in want] != [m for m in want if m in got]:
+            out_of_order += 1
+    return lost, duplicated, out_of_order
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+async def run_all(bot, server, args):
+    header = (
+        f"{'scenario':<10}{'messages':>9}{'time (s)':>10}{'msg/s':>8}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'p99 ms':>9}{'max ms':>9}{'attempts':>10}{'ampl.':>7}{'429s':>6}{'failed':>7}{'lost':>6}{'dup':>5}{'order':>6}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    for scenario in [s for s in args.scenarios.split(",") if s]:
+        latencies, failures = [], []
+        reset_send_state(bot)
+        server.reset()
+        bot.safe_send = timed_safe_send(bot, latencies, failures)
+
+        quiet = open(os.devnull, "w") if not args.verbose else None
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(quiet) if quiet else contextlib.nullcontext():
+            if scenario == "announce":
+                expected, total = await run_announce(bot, server, args.users, args.channels)
+            elif scenario == "nudge":
+                expected, total = await run_nudge(bot, server, args.users)
+            elif scenario == "recap":
+                expected, total = await run_recap(bot, server, args.users, args.channels)
+            else:
+                raise ValueError(f"unknown scenario {scenario}")
+        elapsed = time.perf_counter() - started
+        if quiet:
+            quiet.close()
+
+        delivered = sum(len(messages) for messages in server.delivered.values())
+        lost, duplicated, out_of_order = check_delivery(server, expected)
+        print(
+            f"{scenario:<10}{total:>9}{elapsed:>10.2f}{delivered / elapsed:>8.1f}"
+            f"{percentile(latencies, 0.5) * 1000:>9.0f}{percentile(latencies, 0.95) * 1000:>9.0f}"
+            f"{percentile(latencies, 0.99) * 1000:>9.0f}{max(latencies, default=0) * 1000:>9.0f}"
+            f"{server.attempts:>10}{server.attempts / max(1, delivered):>7.2f}{server.rate_limited:>6}"
+            f"{len(failures):>7}{lost:>6}{duplicated:>5}{out_of_order:>6}"
+        )
+
+
+def main():
+    args = parse_args()
+    server = FakeDiscord(
+        args.latency, args.jitter, args.rate_limit_rate, args.retry_after,
+        args.global_rate, enforce_limits=not args.no_limits,
+    )
+    bot = import_bot()
+
+    print(
+        f"Fake Discord: latency {args.latency}s, scripted 429s {args.rate_limit_rate:.0%} "
+        f"(retry_after {args.retry_after}s), limits {'off' if args.no_limits else 'on'}"
+    )
+    asyncio.run(run_all(bot, server, args))
+
+
+if __name__ == "__main__":
+    main()
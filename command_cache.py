@@ -0,0 +1,83 @@
+"""
+Command result cache - TTL cache for expensive read commands
+"""
+import time
+from metrics import CACHE_REQUESTS, register_gauge_callback
+
+# Seconds each command's rendered output stays valid
+COMMAND_TTLS = {
+    "profile": 300,
+    "today": 120,
+    "progress": 120,
+    "problem": 86400,
+}
+DEFAULT_TTL = 60
+
+# Marks an entry that depends on every registered user (e.g. !progress)
+ALL_USERS = "*"
+
+# (command, args) -> {"value": ..., "expires_at": float, "users": set or None}
+_cache = {}
+
+
+def _make_key(command, args):
+    return (command, tuple(str(a) for a in args))
+
+
+def get_cached(command, *args):
+    """Return the cached result for a command invocation, or None if missing/expired"""
+    key = _make_key(command, args)
+    entry = _cache.get(key)
+    if entry is not None and entry["expires_at"] <= time.monotonic():
+        del _cache[key]
+        entry = None
+
+    CACHE_REQUESTS.inc(cache=f"command:{command}", result="miss" if entry is None else "hit")
+    return entry["value"] if entry is not None else None
+
+
+def set_cached(command, args, value, users=None):
+    """Store a command result.
+
+    Args:
+        users: discord IDs whose new solves should invalidate this entry,
+               ALL_USERS for entries built from every user, or None if the
+               result does not depend on solves at all (e.g. !problem)
+    """
+    if isinstance(users, str):
+        users = {users}
+    elif users is not None:
+        users = {str(u) for u in users}
+
+    ttl = COMMAND_TTLS.get(command, DEFAULT_TTL)
+    _cache[_make_key(command, args)] = {
+        "value": value,
+        "expires_at": time.monotonic() + ttl,
+        "users": users,
+    }
+
+
+def invalidate_user(discord_id):
+    """Drop every cached result affected by a change to this user's solves"""
+    discord_id = str(discord_id)
+    stale_keys = [
+        key for key, entry in _cache.items()
+        if entry["users"] is not None
+        and (discord_id in entry["users"] or ALL_USERS in entry["users"])
+    ]
+    for key in stale_keys:
+        del _cache[key]
+
+
+def invalidate_command(command):
+    """Drop every cached result for a command"""
+    for key in [k for k in _cache if k[0] == command]:
+        del _cache[key]
+
+
+def clear_cache():
+    """Drop all cached results"""
+    _cache.clear()
+
+
+register_gauge_callback("command_cache_entries", "Results held by the command cache", lambda: len(_cache))
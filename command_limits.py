@@ -0,0 +1,109 @@
+"""
+Command limits - cost-based cooldowns and a concurrency cap for expensive commands
+
+Each command is charged its estimated number of LeetCode requests against a
+per-user and a per-guild token bucket. Commands above HEAVY_COST also need one
+of MAX_HEAVY_COMMANDS global slots, so interactive traffic can't crowd out
+the background pollers.
+"""
+import time
+
+# command -> (fixed LeetCode requests, requests per registered user in scope)
+COMMAND_COSTS = {
+    "leaderboard": (0, 3),
+    "progress": (0, 2),
+    "weekly": (0, 3),
+    "profile": (4, 0),
+    "today": (2, 0),
+    "problem": (1, 0),
+}
+DEFAULT_COST = (1, 0)
+
+# Token buckets: (capacity in requests, seconds to refill from empty)
+USER_BUDGET = (60, 60.0)
+GUILD_BUDGET = (300, 60.0)
+
+HEAVY_COST = 20          # commands costing at least this many requests are "heavy"
+MAX_HEAVY_COMMANDS = 2   # heavy commands allowed to run at once across all guilds
+MAX_IDLE_BUCKETS = 2048  # drop full buckets past this many to bound memory
+
+_user_buckets = {}
+_guild_buckets = {}
+_state = {"heavy_running": 0, "heavy_avg_duration": 5.0}
+
+
+def command_cost(command, user_count=0):
+    """Estimate how many LeetCode requests one invocation of a command makes"""
+    fixed, per_user = COMMAND_COSTS.get(command, DEFAULT_COST)
+    return fixed + per_user * user_count
+
+
+def _refill(buckets, key, budget, now):
+    capacity, refill_seconds = budget
+    bucket = buckets.get(key)
+    if bucket is None:
+        if len(buckets) >= MAX_IDLE_BUCKETS:
+            for stale_key in [k for k, b in buckets.items() if b["tokens"] >= capacity]:
+                del buckets[stale_key]
+        bucket = {"tokens": float(capacity), "updated": now}
+        buckets[key] = bucket
+    else:
+        rate = capacity / refill_seconds
+        bucket["tokens"] = min(capacity, bucket["tokens"] + (now - bucket["updated"]) * rate)
+        bucket["updated"] = now
+    return bucket
+
+
+def _wait_for(bucket, budget, cost):
+    """Seconds until the bucket holds `cost` tokens (0 if it already does)"""
+    capacity, refill_seconds = budget
+    # A single command bigger than the whole budget only needs a full bucket
+    cost = min(cost, capacity)
+    missing = cost - bucket["tokens"]
+    if missing <= 0:
+        return 0.0
+    return missing * refill_seconds / capacity
+
+
+def start_command(command, user_id, guild_id, user_count=0):
+    """Try to start a command invocation.
+
+    Returns:
+        (ticket, 0) if the command may run - pass the ticket to finish_command,
+        (None, retry_after) with the seconds to wait otherwise; nothing is charged
+    """
+    now = time.monotonic()
+    cost = command_cost(command, user_count)
+    heavy = cost >= HEAVY_COST
+
+    if heavy and _state["heavy_running"] >= MAX_HEAVY_COMMANDS:
+        return None, _state["heavy_avg_duration"]
+
+    user_bucket = _refill(_user_buckets, str(user_id), USER_BUDGET, now)
+    guild_bucket = _refill(_guild_buckets, str(guild_id), GUILD_BUDGET, now)
+    retry_after = max(
+        _wait_for(user_bucket, USER_BUDGET, cost),
+        _wait_for(guild_bucket, GUILD_BUDGET, cost),
+    )
+    if retry_after > 0:
+        return None, retry_after
+
+    user_bucket["tokens"] -= min(cost, USER_BUDGET[0])
+    guild_bucket["tokens"] -= min(cost, GUILD_BUDGET[0])
+    if heavy:
+        _state["heavy_running"] += 1
+    return {"command": command, "heavy": heavy, "started": now}, 0.0
+
+
+def free_ticket(command):
+    """A ticket for an invocation that makes no LeetCode requests, e.g. one joining a computation in flight"""
+    return {"command": command, "heavy": False, "started": time.monotonic()}
+
+
+def finish_command(ticket):
+    """Release a heavy command's slot and learn how long heavy commands take"""
+    if ticket is None or not ticket["heavy"]:
+        return
+    _state["heavy_running"] = max(0, _state["heavy_running"] - 1)
+    duration = time.monotonic() - ticket["started"]
+    _state["heavy_avg_duration"] = 0.8 * _state["heavy_avg_duration"] + 0.2 * duration
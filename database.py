@@ -2,6 +2,7 @@
 MongoDB database module for persistent storage
 """
 import os
+import threading
 from pymongo import MongoClient
 from dotenv import load_dotenv
 
@@ -12,6 +13,8 @@ MONGODB_URI = os.getenv('MONGODB_URI')
 # Initialize MongoDB client
 client = None
 db = None
+# Startup loads registries from several threads at once; connect only once
+_connect_lock = threading.Lock()
 
 def get_db():
     """Get database connection, initialize if needed"""
@@ -24,16 +27,32 @@ def get_db():
         print("WARNING: MONGODB_URI not set, falling back to JSON files")
         return None
     
+    with _connect_lock:
+        if db is not None:
+            return db
+        try:
+            client = MongoClient(MONGODB_URI)
+            db = client.leettogether  # Database name
+            # Test connection
+            client.admin.command('ping')
+            print("✅ Connected to MongoDB!")
+            return db
+        except Exception as e:
+            print(f"❌ MongoDB connection failed: {e}")
+            return None
+
+def ping_db():
+    """Round-trip to MongoDB; None when no URI is configured"""
+    if not MONGODB_URI:
+        return None
+    if get_db() is None:
+        return False
     try:
-        client = MongoClient(MONGODB_URI)
-        db = client.leettogether  # Database name
-        # Test connection
         client.admin.command('ping')
-        print("✅ Connected to MongoDB!")
-        return db
+        return True
     except Exception as e:
-        print(f"❌ MongoDB connection failed: {e}")
-        return None
+        print(f"❌ MongoDB ping failed: {e}")
+        return False
 
 def close_db():
     """Close database connection"""
@@ -71,3 +90,27 @@ def get_weekly_collection():
     if database is not None:
         return database.weekly
     return None
+
+def get_workers_collection():
+    database = get_db()
+    if database is not None:
+        return database.workers
+    return None
+
+def get_locks_collection():
+    database = get_db()
+    if database is not None:
+        return database.locks
+    return None
+
+def get_outbox_collection():
+    database = get_db()
+    if database is not None:
+        return database.outbox
+    return None
+
+def get_guild_members_collection():
+    database = get_db()
+    if database is not None:
+        return database.guild_members
+    return None
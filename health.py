@@ -0,0 +1,129 @@
+"""
+Health module - liveness and readiness for the /healthz and /readyz routes
+
+Checks report one of three states:
+- ok: working
+- degraded: not ready to serve (fails /readyz) but restarting would not help,
+  e.g. a Discord reconnect in progress or MongoDB briefly unreachable
+- down: the bot is wedged (fails /healthz too) and should be restarted
+
+Scheduled jobs record their last start, end and success here (see
+metrics.instrument_job); jobs registered with expect_job are down once their
+last success is older than their staleness budget.
+"""
+import time
+import threading
+
+STARTUP_GRACE = 300      # seconds after boot before "not started yet" counts as down
+MAX_JOB_RUN = 3 * 3600   # seconds a run in progress counts as healthy before it's presumed hung
+
+_lock = threading.Lock()
+_started_at = time.time()
+# job name -> {"last_start", "last_end", "last_success", "last_error"}
+_jobs = {}
+# job name -> (max_age seconds, predicate saying whether this worker should run it, max_run seconds)
+_expected = {}
+# job name -> when its active predicate was seen turning True (e.g. becoming leader),
+# None while inactive; jobs active since the first check are measured from boot
+_active_since = {}
+# (name, fn returning (state, details))
+_checks = []
+
+
+def _iso(timestamp):
+    if timestamp is None:
+        return None
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
+
+
+def job_started(name):
+    with _lock:
+        _jobs.setdefault(name, {"last_start": None, "last_end": None, "last_success": None, "last_error": None})
+        _jobs[name]["last_start"] = time.time()
+
+
+def job_finished(name, error=None):
+    now = time.time()
+    with _lock:
+        job = _jobs.setdefault(name, {"last_start": None, "last_end": None, "last_success": None, "last_error": None})
+        job["last_end"] = now
+        if error is None:
+            job["last_success"] = now
+        else:
+            job["last_error"] = f"{type(error).__name__}: {error}"
+
+
+def expect_job(name, max_age, active=None, max_run=MAX_JOB_RUN):
+    """Mark name down if it hasn't succeeded within max_age seconds.
+
+    active, if given, is called at check time; when it returns False (for example
+    a leader-only job on a follower) the job is reported but never fails health,
+    and once it turns True the budget is counted from then rather than from boot.
+    A run still in progress is healthy for up to max_run seconds, so a long poll
+    over a big registry isn't killed mid-run and restarted from scratch.
+    """
+    _expected[name] = (max_age, active, max_run)
+
+
+def register_check(name, fn):
+    """Add a health check; fn returns (state, details) with state "ok", "degraded" or "down" """
+    _checks.append((name, fn))
+
+
+def in_startup_grace():
+    return time.time() - _started_at < STARTUP_GRACE
+
+
+def _check_jobs():
+    now = time.time()
+    state = "ok"
+    details = {}
+    with _lock:
+        jobs = {name: dict(job) for name, job in _jobs.items()}
+
+    for name in sorted(set(jobs) | set(_expected)):
+        job = jobs.get(name, {})
+        entry = {
+            "last_start": _iso(job.get("last_start")),
+            "last_end": _iso(job.get("last_end")),
+            "last_success": _iso(job.get("last_success")),
+            "last_error": job.get("last_error"),
+        }
+        if name in _expected:
+            max_age, active, max_run = _expected[name]
+            entry["max_age_seconds"] = max_age
+            last_start = job.get("last_start")
+            entry["running"] = last_start is not None and last_start > (job.get("last_end") or 0)
+            entry["active"] = active is None or bool(active())
+            if not entry["active"]:
+                _active_since[name] = None
+            elif _active_since.get(name, _started_at) is None:
+                _active_since[name] = now
+            # Measured from the last success, or from when this worker took the job on
+            since = max(job.get("last_success") or 0, _active_since.get(name) or _started_at)
+            entry["stale"] = entry["active"] and now - since > max_age
+            if entry["stale"] and entry["running"] and now - last_start <= max_run:
+                entry["stale"] = False
+            if entry["stale"]:
+                state = "down"
+        details[name] = entry
+    return state, details
+
+
+def health_report(readiness):
+    """Return (healthy, body); liveness fails only on "down", readiness on anything but "ok" """
+    results = {}
+    for name, fn in [("jobs", _check_jobs)] + _checks:
+        try:
+            state, details = fn()
+        except Exception as e:
+            state, details = "down", {"error": f"{type(e).__name__}: {e}"}
+        results[name] = {"state": state, **details}
+
+    failing = ("degraded", "down") if readiness else ("down",)
+    healthy = all(r["state"] not in failing for r in results.values())
+    return healthy, {
+        "status": "ok" if healthy else "fail",
+        "uptime_seconds": round(time.time() - _started_at),
+        "checks": results,
+    }
@@ -1,5 +1,7 @@
 import os
 import json
+import threading
+from tracing import traced
 
 # Try to import database module
 try:
@@ -10,6 +12,18 @@ except ImportError:
 
 ANNOUNCEMENTS_PATH = "hourly_announcements.json"
 
+# Solves are synced from worker threads; serialize the JSON file's read-modify-write
+_file_lock = threading.Lock()
+
+
+def _write_announcements_file(data):
+    """Write the JSON backup atomically so concurrent readers never see a truncated file"""
+    tmp_path = f"{ANNOUNCEMENTS_PATH}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, ANNOUNCEMENTS_PATH)
+
+@traced("storage.load_announcements")
 def load_announcements():
     """Load announcements from MongoDB or JSON"""
     if MONGO_AVAILABLE:
@@ -36,6 +50,7 @@ def load_announcements():
     except (json.JSONDecodeError, Exception):
         return {}
 
+@traced("storage.save_announcements")
 def save_announcements(data):
     """Save announcements to MongoDB and JSON"""
     if MONGO_AVAILABLE:
@@ -47,5 +62,47 @@ def save_announcements(data):
                 collection.insert_many(docs)
     
     # Always save to JSON as backup
-    with open(ANNOUNCEMENTS_PATH, "w") as f:
-        json.dump(data, f, indent=4)
\ No newline at end of file
+    with _file_lock:
+        _write_announcements_file(data)
+
+@traced("storage.load_user_announcements")
+def load_user_announcements(discord_id):
+    """Load one user's tracked solves from MongoDB or JSON"""
+    discord_id = str(discord_id)
+    if MONGO_AVAILABLE:
+        collection = get_announcements_collection()
+        if collection is not None:
+            doc = collection.find_one({"discord_id": discord_id})
+            return doc.get("solves", []) if doc else []
+    
+    return load_announcements().get(discord_id, [])
+
+@traced("storage.save_user_announcements")
+def save_user_announcements(discord_id, solves):
+    """Save one user's tracked solves without rewriting other users' entries.
+    
+    Lets several polling workers update their own users concurrently.
+    """
+    discord_id = str(discord_id)
+    if MONGO_AVAILABLE:
+        collection = get_announcements_collection()
+        if collection is not None:
+            collection.replace_one(
+                {"discord_id": discord_id},
+                {"discord_id": discord_id, "solves": solves},
+                upsert=True
+            )
+    
+    # Always save to JSON as backup
+    with _file_lock:
+        data = {}
+        if os.path.exists(ANNOUNCEMENTS_PATH):
+            try:
+                with open(ANNOUNCEMENTS_PATH, "r") as f:
+                    content = f.read().strip()
+                    if content:
+                        data = json.loads(content)
+            except (json.JSONDecodeError, Exception):
+                data = {}
+        data[discord_id] = solves
+        _write_announcements_file(data)
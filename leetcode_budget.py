@@ -0,0 +1,152 @@
+"""
+LeetCode request budget - shares the API quota between jobs and commands by priority
+
+Requests are admitted per fixed window. Each priority class is guaranteed a
+share of the window; capacity a class isn't using can be borrowed by others
+(higher priority first), but never the unused guarantee of a class that is
+currently waiting. The caller's class comes from a context variable, so it
+follows work into asyncio.to_thread.
+"""
+import os
+import time
+import inspect
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Priority classes, highest first
+STREAK = "streak"            # end-of-day streak and status checks
+ANNOUNCE = "announce"        # submission polling, nudges, daily challenge
+INTERACTIVE = "interactive"  # user commands
+BACKFILL = "backfill"        # weekly catch-up syncs
+CLASSES = [STREAK, ANNOUNCE, INTERACTIVE, BACKFILL]
+
+# Guaranteed fraction of each window per class
+CLASS_SHARES = {
+    STREAK: 0.4,
+    ANNOUNCE: 0.3,
+    INTERACTIVE: 0.2,
+    BACKFILL: 0.1,
+}
+
+REQUESTS_PER_MINUTE = int(os.getenv("LEETCODE_REQUESTS_PER_MINUTE", "120"))
+WINDOW_SECONDS = 10
+
+_current_class = contextvars.ContextVar("leetcode_request_class", default=INTERACTIVE)
+
+_condition = threading.Condition()
+_capacity = max(len(CLASSES), REQUESTS_PER_MINUTE * WINDOW_SECONDS // 60)
+_guaranteed = {cls: max(1, int(_capacity * CLASS_SHARES[cls])) for cls in CLASSES}
+_window = {"end": 0.0, "used": {cls: 0 for cls in CLASSES}}
+_waiting = {cls: 0 for cls in CLASSES}
+_totals = {cls: {"requests": 0, "borrowed": 0, "wait_seconds": 0.0} for cls in CLASSES}
+
+
+@contextmanager
+def request_class(cls):
+    """Charge LeetCode requests made inside this block (and threads it starts) to `cls`"""
+    token = _current_class.set(cls)
+    try:
+        yield
+    finally:
+        _current_class.reset(token)
+
+
+def _roll_window(now):
+    if now >= _window["end"]:
+        _window["end"] = now + WINDOW_SECONDS
+        _window["used"] = {cls: 0 for cls in CLASSES}
+        # New capacity - let waiters re-check
+        _condition.notify_all()
+
+
+def _admit(cls):
+    """Return 'own', 'borrow', or None if `cls` must wait. Caller holds _condition."""
+    used = _window["used"]
+    used_total = sum(used.values())
+    if used_total >= _capacity:
+        return None
+    if used[cls] < _guaranteed[cls]:
+        return "own"
+
+    # Borrowing: keep the unused guarantees of other waiting classes reserved
+    reserved = sum(
+        max(0, _guaranteed[other] - used[other])
+        for other in CLASSES
+        if other != cls and _waiting[other]
+    )
+    if _capacity - used_total <= reserved:
+        return None
+    # Higher priority classes borrow first
+    if any(_waiting[other] for other in CLASSES[:CLASSES.index(cls)]):
+        return None
+    return "borrow"
+
+
+def acquire():
+    """Block until the current priority class may send one LeetCode request"""
+    cls = _current_class.get()
+    started = time.monotonic()
+    with _condition:
+        _waiting[cls] += 1
+        try:
+            while True:
+                now = time.monotonic()
+                _roll_window(now)
+                grant = _admit(cls)
+                if grant is not None:
+                    break
+                _condition.wait(timeout=max(0.01, _window["end"] - now))
+        finally:
+            _waiting[cls] -= 1
+
+        _window["used"][cls] += 1
+        totals = _totals[cls]
+        totals["requests"] += 1
+        totals["wait_seconds"] += time.monotonic() - started
+        if grant == "borrow":
+            totals["borrowed"] += 1
+        # A waiter that was blocked on our reservation may now go
+        _condition.notify_all()
+
+
+def get_usage():
+    """Per-class budget usage for the current window and since startup"""
+    with _condition:
+        _roll_window(time.monotonic())
+        return {
+            cls: {
+                "guaranteed": _guaranteed[cls],
+                "window_used": _window["used"][cls],
+                "waiting": _waiting[cls],
+                **_totals[cls],
+            }
+            for cls in CLASSES
+        }
+
+
+def get_capacity():
+    """Requests admitted per window across all classes"""
+    return _capacity
+
+
+def prioritized(cls):
+    """Decorate a job (sync or async) so its LeetCode requests are charged to `cls`"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with request_class(cls):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with request_class(cls):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,162 @@
+"""
+Stale-while-revalidate cache for LeetCode GraphQL reads
+
+Every successful response is kept as the last known good value. While
+LeetCode is healthy, expired entries are refetched inline. Once a request
+fails, LeetCode is treated as degraded for DEGRADED_SECONDS: reads are
+answered from the last known good value straight away and refreshed in a
+background thread, so an outage costs no extra latency.
+
+Callers that must not act on old data wrap their reads in read_status() and
+check whether anything they got was stale or missing.
+"""
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from metrics import CACHE_REQUESTS, register_gauge_callback
+
+FRESH_TTL = 60           # seconds a response is served without refetching
+MAX_STALE_AGE = 86400    # never serve a last known good value older than this
+DEGRADED_SECONDS = 30    # after a failure, serve stale values without waiting on LeetCode
+MAX_ENTRIES = 4096
+
+_lock = threading.Lock()
+# key -> {"data": parsed JSON, "fetched_at": float}
+_entries = {}
+_revalidating = set()
+_health = {"degraded_until": 0.0}
+
+_read_status = contextvars.ContextVar("leetcode_read_status", default=None)
+
+
+class LeetCodeUnavailable(Exception):
+    """A LeetCode read failed and there is no last known good value to serve"""
+
+
+class ReadStatus:
+    """Collects whether any read inside a read_status() block was stale or failed"""
+
+    def __init__(self):
+        self.stale = False
+        self.failed = False
+        self.max_age = 0.0
+
+    @property
+    def degraded(self):
+        return self.stale or self.failed
+
+    def _record_stale(self, age):
+        self.stale = True
+        self.max_age = max(self.max_age, age)
+
+
+@contextmanager
+def read_status():
+    """Track the freshness of LeetCode reads made in this block (and threads it starts)"""
+    status = ReadStatus()
+    token = _read_status.set(status)
+    try:
+        yield status
+    finally:
+        _read_status.reset(token)
+
+
+def _make_key(url, payload):
+    return url, json.dumps(payload, sort_keys=True)
+
+
+def _store(key, data):
+    with _lock:
+        if key not in _entries and len(_entries) >= MAX_ENTRIES:
+            # Evict the oldest entry (dicts keep insertion order)
+            del _entries[next(iter(_entries))]
+        _entries[key] = {"data": data, "fetched_at": time.time()}
+        _health["degraded_until"] = 0.0
+
+
+def _mark_degraded():
+    with _lock:
+        _health["degraded_until"] = time.monotonic() + DEGRADED_SECONDS
+
+
+def _serve_stale(entry, error):
+    age = time.time() - entry["fetched_at"]
+    status = _read_status.get()
+    if status is not None:
+        status._record_stale(age)
+    if error is not None:
+        print(f"LeetCode read failed ({error}), serving data from {age:.0f}s ago")
+    return entry["data"]
+
+
+def _revalidate_in_background(key, fetch):
+    with _lock:
+        if key in _revalidating:
+            return
+        _revalidating.add(key)
+
+    def run():
+        try:
+            _store(key, fetch())
+        except Exception as e:
+            _mark_degraded()
+            print(f"Background LeetCode revalidation failed: {e}")
+        finally:
+            with _lock:
+                _revalidating.discard(key)
+
+    # Keep the caller's priority class for the refetch
+    context = contextvars.copy_context()
+    threading.Thread(target=context.run, args=(run,), daemon=True).start()
+
+
+def cached_read(url, payload, fetch):
+    """Return the parsed response for a GraphQL request, fresh or last known good.
+
+    Args:
+        fetch: performs the request and returns the parsed JSON, raising on failure
+
+    Raises:
+        LeetCodeUnavailable: the request failed and nothing usable is cached
+    """
+    key = _make_key(url, payload)
+    with _lock:
+        entry = _entries.get(key)
+        degraded = time.monotonic() < _health["degraded_until"]
+
+    if entry is not None:
+        age = time.time() - entry["fetched_at"]
+        if age < FRESH_TTL:
+            CACHE_REQUESTS.inc(cache="leetcode", result="hit")
+            return entry["data"]
+        if degraded and age < MAX_STALE_AGE:
+            CACHE_REQUESTS.inc(cache="leetcode", result="stale")
+            _revalidate_in_background(key, fetch)
+            return _serve_stale(entry, None)
+
+    CACHE_REQUESTS.inc(cache="leetcode", result="miss")
+    try:
+        data = fetch()
+    except Exception as e:
+        _mark_degraded()
+        if entry is not None and time.time() - entry["fetched_at"] < MAX_STALE_AGE:
+            return _serve_stale(entry, e)
+        status = _read_status.get()
+        if status is not None:
+            status.failed = True
+        raise LeetCodeUnavailable(str(e)) from e
+
+    _store(key, data)
+    return data
+
+
+def clear_read_cache():
+    """Drop every cached response"""
+    with _lock:
+        _entries.clear()
+        _health["degraded_until"] = 0.0
+
+
+register_gauge_callback("leetcode_cache_entries", "Responses held by the LeetCode read cache", lambda: len(_entries))
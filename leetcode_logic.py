@@ -1,10 +1,67 @@
+import os
+import re
+import time
 import requests
 from datetime import datetime
 import pytz
+from markdown_render import html_to_markdown
+from leetcode_budget import acquire
+from leetcode_cache import cached_read
+from leetcode_replay import send_request
+from metrics import LEETCODE_LATENCY, LEETCODE_ERRORS, LEETCODE_RATE_LIMITED
+from tracing import span
+
+# Point at a local stand-in (see bench/fake_leetcode.py) for load tests
+LEETCODE_GRAPHQL_URL = os.getenv("LEETCODE_GRAPHQL_URL", "https://leetcode.com/graphql")
+
+_QUERY_NAME = re.compile(r"query\s+(\w+)")
+
+class _CachedResponse:
+    """Stand-in for requests.Response backed by a cached JSON body"""
+    def __init__(self, data):
+        self._data = data
+
+    def json(self):
+        return self._data
+
+def _post(url, **kwargs):
+    """POST to LeetCode through the request budget and the stale-while-revalidate cache.
+
+    Raises when the request fails and no last known good response is cached.
+    """
+    match = _QUERY_NAME.search((kwargs.get("json") or {}).get("query", ""))
+    query_name = match.group(1) if match else "unknown"
+
+    def fetch():
+        with span("leetcode", query=query_name) as current:
+            waited = time.monotonic()
+            acquire()
+            started = time.monotonic()
+            current.attrs["budget_wait_ms"] = round((started - waited) * 1000, 2)
+            try:
+                response = send_request(url, **kwargs)
+            except requests.Timeout:
+                LEETCODE_ERRORS.inc(query=query_name, reason="timeout")
+                raise
+            except Exception:
+                LEETCODE_ERRORS.inc(query=query_name, reason="connection")
+                raise
+            finally:
+                LEETCODE_LATENCY.observe(time.monotonic() - started, query=query_name)
+
+            current.attrs["status"] = response.status_code
+            if response.status_code == 429:
+                LEETCODE_RATE_LIMITED.inc(query=query_name)
+            if response.status_code >= 400:
+                LEETCODE_ERRORS.inc(query=query_name, reason=f"http_{response.status_code}")
+            response.raise_for_status()
+            return response.json()
+
+    return _CachedResponse(cached_read(url, kwargs.get("json"), fetch))
 
 def fetch_recent_submissions(username):
     """Fetch recent submissions from LeetCode GraphQL API"""
-    url = "https://leetcode.com/graphql"
+    url = LEETCODE_GRAPHQL_URL
 
     query = """
     query recentSubmissions($username: String!) {
@@ -25,7 +82,7 @@ def fetch_recent_submissions(username):
     }
 
     try:
-        response = requests.post(
+        response = _post(
             url,
             headers=headers,
             json={"query": query, "variables": variables},
@@ -41,7 +98,7 @@ def fetch_recent_submissions(username):
 
 def fetch_all_solved_problems(username):
     """Fetch all problems the user has ever solved (AC submissions) - last 100 only"""
-    url = "https://leetcode.com/graphql"
+    url = LEETCODE_GRAPHQL_URL
 
     query = """
     query userProblemsSolved($username: String!) {
@@ -61,7 +118,7 @@ def fetch_all_solved_problems(username):
     }
 
     try:
-        response = requests.post(
+        response = _post(
             url,
             headers=headers,
             json={"query": query, "variables": variables},
@@ -77,7 +134,7 @@ def fetch_all_solved_problems(username):
 
 def fetch_all_solved_problem_slugs(username):
     """Fetch ALL unique problem slugs the user has ever solved (not just recent 100)"""
-    url = "https://leetcode.com/graphql"
+    url = LEETCODE_GRAPHQL_URL
 
     query = """
     query userProblemsSolved($username: String!) {
@@ -137,7 +194,7 @@ def fetch_all_solved_problem_slugs(username):
     """
 
     try:
-        response = requests.post(
+        response = _post(
             url,
             headers=headers,
             json={"query": query_large, "variables": variables},
@@ -174,7 +231,7 @@ def get_first_solve_date(username, title_slug):
 
 def fetch_problem_details(title_slug):
     """Fetch problem details including difficulty and question number"""
-    url = "https://leetcode.com/graphql"
+    url = LEETCODE_GRAPHQL_URL
 
     query = """
     query questionData($titleSlug: String!) {
@@ -198,7 +255,7 @@ def fetch_problem_details(title_slug):
     }
 
     try:
-        response = requests.post(
+        response = _post(
             url,
             headers=headers,
             json={"query": query, "variables": variables},
@@ -214,7 +271,7 @@ def fetch_problem_details(title_slug):
 
 def fetch_user_stats(username):
     """Fetch user's overall stats including difficulty breakdown"""
-    url = "https://leetcode.com/graphql"
+    url = LEETCODE_GRAPHQL_URL
 
     query = """
     query userStats($username: String!) {
@@ -242,7 +299,7 @@ def fetch_user_stats(username):
     }
 
     try:
-        response = requests.post(
+        response = _post(
             url,
             headers=headers,
             json={"query": query, "variables": variables},
@@ -263,7 +320,7 @@ def get_problems_solved_before_today(username):
     For each problem, finds the EARLIEST solve date - if it's before today,
     the problem counts as previously solved.
     """
-    url = "https://leetcode.com/graphql"
+    url = LEETCODE_GRAPHQL_URL
     
     # Fetch with higher limit to catch older solves
     query = """
@@ -283,7 +340,7 @@ def get_problems_solved_before_today(username):
     }
     
     try:
-        response = requests.post(
+        response = _post(
             url,
             headers=headers,
             json={"query": query, "variables": variables},
@@ -511,7 +568,7 @@ def get_today_stats(username):
 
 def get_weekly_solved_problems(username, week_start, week_end):
     """Get list of NEW problems solved within a date range (for weekly sync)"""
-    url = "https://leetcode.com/graphql"
+    url = LEETCODE_GRAPHQL_URL
     
     # Get recent AC submissions with larger limit for weekly data
     query = """
@@ -531,7 +588,7 @@ def get_weekly_solved_problems(username, week_start, week_end):
     }
     
     try:
-        response = requests.post(
+        response = _post(
             url,
             headers=headers,
             json={"query": query, "variables": variables},
@@ -618,7 +675,7 @@ def get_user_ranking(username):
 
 def fetch_problem_full_details(title_slug):
     """Fetch full problem details including description"""
-    url = "https://leetcode.com/graphql"
+    url = LEETCODE_GRAPHQL_URL
 
     query = """
     query questionData($titleSlug: String!) {
@@ -648,7 +705,7 @@ def fetch_problem_full_details(title_slug):
     }
 
     try:
-        response = requests.post(
+        response = _post(
             url,
             headers=headers,
             json={"query": query, "variables": variables},
@@ -664,7 +721,7 @@ def fetch_problem_full_details(title_slug):
 
 def fetch_problem_by_number(question_no):
     """Fetch problem details by question number (frontend ID)"""
-    url = "https://leetcode.com/graphql"
+    url = LEETCODE_GRAPHQL_URL
 
     # First, we need to get the titleSlug from the question number
     query = """
@@ -698,7 +755,7 @@ def fetch_problem_by_number(question_no):
     }
 
     try:
-        response = requests.post(
+        response = _post(
             url,
             headers=headers,
             json={"query": query, "variables": variables},
@@ -720,7 +777,7 @@ def fetch_problem_by_number(question_no):
 
 def fetch_daily_challenge():
     """Fetch today's daily challenge problem"""
-    url = "https://leetcode.com/graphql"
+    url = LEETCODE_GRAPHQL_URL
 
     query = """
     query questionOfToday {
@@ -750,7 +807,7 @@ def fetch_daily_challenge():
     }
 
     try:
-        response = requests.post(
+        response = _post(
             url,
             headers=headers,
             json={"query": query},
@@ -769,38 +826,5 @@ def fetch_daily_challenge():
         return None
 
 def strip_html(html_content):
-    """Strip HTML tags and convert to plain text for Discord"""
-    import re
-    if not html_content:
-        return ""
-    
-    # Replace common HTML entities
-    text = html_content.replace("&nbsp;", " ")
-    text = text.replace("&lt;", "<")
-    text = text.replace("&gt;", ">")
-    text = text.replace("&amp;", "&")
-    text = text.replace("&quot;", '"')
-    text = text.replace("&#39;", "'")
-    
-    # Replace <br>, <p>, <li> with newlines
-    text = re.sub(r'<br\s*/?>', '\n', text)
-    text = re.sub(r'</p>', '\n\n', text)
-    text = re.sub(r'<li>', '\n• ', text)
-    
-    # Replace <code> and <pre> with markdown code blocks
-    text = re.sub(r'<pre>(.*?)</pre>', r'```\n\1\n```', text, flags=re.DOTALL)
-    text = re.sub(r'<code>(.*?)</code>', r'`\1`', text)
-    
-    # Replace <strong> and <b> with bold
-    text = re.sub(r'<(strong|b)>(.*?)</(strong|b)>', r'**\2**', text)
-    
-    # Replace <em> and <i> with italic
-    text = re.sub(r'<(em|i)>(.*?)</(em|i)>', r'*\2*', text)
-    
-    # Remove all other HTML tags
-    text = re.sub(r'<[^>]+>', '', text)
-    
-    # Clean up multiple newlines
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    
-    return text.strip()
+    """Convert problem HTML to Discord markdown (see markdown_render)"""
+    return html_to_markdown(html_content)
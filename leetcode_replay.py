@@ -0,0 +1,205 @@
+"""
+Record and replay of LeetCode GraphQL traffic
+
+With LEETCODE_RECORD=<file.jsonl.gz> every request the bot actually sends
+(below the read cache and the request budget) is appended to a gzip JSON-lines
+fixture with its payload, status, body and latency. With
+LEETCODE_REPLAY=<file.jsonl.gz> nothing goes over the network: each request is
+answered from the fixture, identical requests in recorded order (the last
+answer repeats once they run out), optionally after the recorded latency.
+
+Records carry the wall-clock time they were made. Jobs decide what "today" is
+from datetime.now(), so a replay shifts that clock (shift_clock) to when the
+fixture was recorded; otherwise a fixture from another day counts different solves.
+
+    LEETCODE_RECORD=traffic-2026-10-19.jsonl.gz python main.py
+    python bench/replay_bench.py traffic-2026-10-19.jsonl.gz
+"""
+import os
+import re
+import gzip
+import json
+import time
+import atexit
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LEETCODE_RECORD = os.getenv("LEETCODE_RECORD")
+LEETCODE_REPLAY = os.getenv("LEETCODE_REPLAY")
+# "recorded" sleeps each response's recorded latency, "none" answers instantly
+LEETCODE_REPLAY_TIMING = os.getenv("LEETCODE_REPLAY_TIMING", "recorded")
+RECORD_FLUSH_EVERY = 50
+
+_QUERY_NAME = re.compile(r"query\s+(\w+)")
+
+
+class ReplayMiss(requests.ConnectionError):
+    """A replayed run sent a request that is not in the fixture"""
+
+
+def _key(payload):
+    return json.dumps(payload, sort_keys=True)
+
+
+def _build_response(url, status, body):
+    response = requests.Response()
+    response.status_code = status
+    response.url = url
+    response.reason = "OK" if status < 400 else "Replayed error"
+    response._content = json.dumps(body).encode("utf-8") if not isinstance(body, str) else body.encode("utf-8")
+    response.headers["Content-Type"] = "application/json"
+    return response
+
+
+class Recorder:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.pending = 0
+        # Appending adds a new gzip member; readers see one continuous stream
+        self.file = gzip.open(path, "at", encoding="utf-8")
+        atexit.register(self.close)
+
+    def post(self, url, **kwargs):
+        started = time.monotonic()
+        try:
+            response = requests.post(url, **kwargs)
+        except Exception as e:
+            self._write(kwargs.get("json"), None, f"{type(e).__name__}: {e}", time.monotonic() - started)
+            raise
+        try:
+            body = response.json()
+        except ValueError:
+            body = response.text
+        self._write(kwargs.get("json"), response.status_code, body, time.monotonic() - started)
+        return response
+
+    def _write(self, payload, status, body, elapsed):
+        now = time.time()
+        record = {
+            "time": round(now, 3),
+            "at": round(now - self.started, 3),
+            "elapsed": round(elapsed, 4),
+            "request": payload,
+            "status": status,
+            "body": body,
+        }
+        with self.lock:
+            self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self.pending += 1
+            if self.pending >= RECORD_FLUSH_EVERY:
+                self.file.flush()
+                self.pending = 0
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+
+class Replayer:
+    def __init__(self, path, timing=LEETCODE_REPLAY_TIMING):
+        self.timing = timing
+        self.lock = threading.Lock()
+        self.records = load_fixture(path)
+        self.reset()
+
+    def reset(self):
+        """Rewind to the start of the fixture and clear the counters"""
+        with self.lock:
+            self.responses = {}
+            for record in self.records:
+                self.responses.setdefault(_key(record["request"]), deque()).append(record)
+            self.last = {}
+            self.stats = {"hits": 0, "repeats": 0, "misses": 0}
+            self.queries = {}
+
+    def post(self, url, **kwargs):
+        key = _key(kwargs.get("json"))
+        match = _QUERY_NAME.search((kwargs.get("json") or {}).get("query", ""))
+        query_name = match.group(1) if match else "unknown"
+        with self.lock:
+            self.queries[query_name] = self.queries.get(query_name, 0) + 1
+            queue = self.responses.get(key)
+            if queue:
+                record = queue.popleft()
+                self.last[key] = record
+                self.stats["hits"] += 1
+            else:
+                record = self.last.get(key)
+                self.stats["repeats" if record else "misses"] += 1
+
+        if record is None:
+            raise ReplayMiss(f"request not in fixture: {key[:200]}")
+        if self.timing == "recorded":
+            time.sleep(record["elapsed"])
+        if record["status"] is None:
+            raise requests.ConnectionError(record["body"])
+        return _build_response(url, record["status"], record["body"])
+
+
+def load_fixture(path):
+    """Every recorded exchange in a fixture, in recording order"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def fixture_started_at(records):
+    """Unix time the fixture's recording started, or None for fixtures recorded without times"""
+    for record in records:
+        if "time" in record:
+            return record["time"] - record["at"]
+    return None
+
+
+class _ShiftedDatetime(datetime):
+    """datetime whose now() runs `offset` seconds away from the real clock"""
+    offset = 0.0
+
+    @classmethod
+    def now(cls, tz=None):
+        return datetime.now(tz) + timedelta(seconds=cls.offset)
+
+
+def shift_clock(modules, started_at):
+    """Make datetime.now() in each module start from started_at, ticking in real time.
+
+    Only "now" moves; timestamp conversions and time.time() (used for ages and
+    backoffs, not dates) are untouched. Returns the offset in seconds.
+    """
+    _ShiftedDatetime.offset = started_at - time.time()
+    for module in modules:
+        module.datetime = _ShiftedDatetime
+    return _ShiftedDatetime.offset
+
+
+_recorder = Recorder(LEETCODE_RECORD) if LEETCODE_RECORD else None
+_replayer = Replayer(LEETCODE_REPLAY) if LEETCODE_REPLAY else None
+
+
+def send_request(url, **kwargs):
+    """requests.post, or its recording / replaying stand-in when configured"""
+    if _replayer is not None:
+        return _replayer.post(url, **kwargs)
+    if _recorder is not None:
+        return _recorder.post(url, **kwargs)
+    return requests.post(url, **kwargs)
+
+
+def get_replay_stats():
+    """Fixture hits, repeated answers, misses and requests per query (None unless replaying)"""
+    if _replayer is None:
+        return None
+    with _replayer.lock:
+        return {**_replayer.stats, "queries": dict(_replayer.queries)}
+
+
+def reset_replay():
+    if _replayer is not None:
+        _replayer.reset()
@@ -0,0 +1,110 @@
+"""
+Event-loop watchdog - catches blocking calls made on the bot loop
+
+A heartbeat task sleeps for CHECK_INTERVAL and measures how late it wakes up;
+the lateness is the loop lag. A watcher thread notices when the heartbeat is
+overdue and captures the loop thread's stack while it is still blocked, so the
+stall is logged with the code that caused it rather than whatever ran next.
+
+Opt-in: set LOOP_WATCHDOG=1 (threshold from LOOP_STALL_THRESHOLD_MS, default 250).
+"""
+import os
+import sys
+import time
+import asyncio
+import threading
+import traceback
+from dotenv import load_dotenv
+from metrics import Counter, Histogram
+
+load_dotenv()
+
+LOOP_WATCHDOG_ENABLED = os.getenv("LOOP_WATCHDOG", "").lower() in ("1", "true", "yes")
+STALL_THRESHOLD = int(os.getenv("LOOP_STALL_THRESHOLD_MS", "250")) / 1000
+CHECK_INTERVAL = 0.1
+STACK_LIMIT = 15
+
+LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "How late the event loop heartbeat woke up",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+LOOP_STALLS = Counter(
+    "event_loop_stalls_total", "Event loop stalls longer than LOOP_STALL_THRESHOLD_MS", ["site"]
+)
+
+_state = {"task": None, "thread": None}
+
+
+def _stall_site(frames):
+    """The innermost frame outside the standard library and site-packages, as file:line"""
+    stdlib = os.path.dirname(os.__file__)
+    for frame in reversed(frames):
+        if not frame.filename.startswith(stdlib) and "site-packages" not in frame.filename:
+            return f"{os.path.basename(frame.filename)}:{frame.lineno}"
+    return "unknown"
+
+
+def _task_frames(frames):
+    """Drop the event loop's own frames so the stack starts at the blocking callback"""
+    for i in range(len(frames) - 1, -1, -1):
+        if frames[i].filename.endswith(os.path.join("asyncio", "events.py")):
+            return frames[i + 1:]
+    return frames
+
+
+class LoopWatchdog:
+    def __init__(self, loop, threshold=STALL_THRESHOLD, interval=CHECK_INTERVAL):
+        self.loop = loop
+        self.threshold = threshold
+        self.interval = interval
+        self.loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        # Stack captured by the watcher while the current stall is in progress
+        self._stall_stack = None
+        self._stopped = threading.Event()
+
+    async def heartbeat(self):
+        while not self._stopped.is_set():
+            before = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - before - self.interval)
+            self._last_beat = now
+            LOOP_LAG.observe(lag)
+            if lag >= self.threshold:
+                self._report(lag)
+            else:
+                self._stall_stack = None
+
+    def watch(self):
+        # Runs in its own thread; the loop thread cannot inspect itself while blocked
+        while not self._stopped.wait(self.interval):
+            overdue = time.monotonic() - self._last_beat - self.interval
+            if overdue >= self.threshold and self._stall_stack is None:
+                frame = sys._current_frames().get(self.loop_thread_id)
+                if frame is not None:
+                    self._stall_stack = _task_frames(traceback.extract_stack(frame))
+
+    def _report(self, lag):
+        frames, self._stall_stack = self._stall_stack, None
+        site = _stall_site(frames) if frames else "unknown"
+        LOOP_STALLS.inc(site=site)
+        print(f"⚠️ Event loop blocked for {lag * 1000:.0f}ms at {site}")
+        if frames:
+            print("".join(traceback.format_list(frames[-STACK_LIMIT:])), end="")
+
+    def stop(self):
+        self._stopped.set()
+
+
+def start_watchdog():
+    """Start the watchdog on the running loop if LOOP_WATCHDOG is set; safe to call more than once"""
+    if not LOOP_WATCHDOG_ENABLED or _state["task"] is not None:
+        return None
+
+    watchdog = LoopWatchdog(asyncio.get_running_loop())
+    _state["task"] = asyncio.create_task(watchdog.heartbeat())
+    _state["thread"] = threading.Thread(target=watchdog.watch, name="loop-watchdog", daemon=True)
+    _state["thread"].start()
+    print(f"Event loop watchdog on (stall threshold {watchdog.threshold * 1000:.0f}ms)")
+    return watchdog
@@ -1,8 +1,11 @@
 import discord
 from discord.ext import commands
+from aiohttp import web
 import logging
 from dotenv import load_dotenv
 import os
+import time
+import math
 import asyncio
 from leetcode_logic import (
     has_user_solved_today, 
@@ -16,7 +19,6 @@ from leetcode_logic import (
     get_today_stats,
     fetch_problem_by_number,
     fetch_daily_challenge,
-    strip_html,
     get_weekly_solved_problems
 )
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -35,21 +37,136 @@ from storage import (
     load_weekly,
     save_weekly,
     reset_weekly,
-    update_weekly_solve
+    update_weekly_solve,
+    load_dm_channels,
+    save_dm_channels,
+    load_guild_members,
+    save_guild_members,
+    enqueue_outbox,
+    claim_due_outbox,
+    complete_outbox_item,
+    retry_outbox_item,
+    count_pending_outbox,
+    check_storage,
+    connect_storage
+)
+from hourly_announcements import (
+    load_announcements,
+    load_user_announcements,
+    save_user_announcements
+)
+from markdown_render import render_problem_description
+from command_cache import get_cached, set_cached, invalidate_user, ALL_USERS
+from single_flight import coalesce, is_in_flight
+from api_views import publish as publish_api_views, respond as respond_api_view
+from leetcode_cache import read_status
+from metrics import (
+    instrument_job,
+    register_gauge_callback,
+    DISCORD_SEND_WAITING,
+    DISCORD_SEND_RETRIES,
+    OUTBOX_RETRIES
+)
+from loop_watchdog import start_watchdog
+from health import register_check, expect_job, in_startup_grace
+from startup import (
+    startup_phase,
+    record_since_start,
+    get_phase_timings,
+    format_phase_timings,
+    mark_loaded,
+    is_loaded,
+    wait_until_loaded
+)
+from tracing import span, start_span, end_span, get_recent_spans, summarize_spans
+from command_limits import start_command, finish_command, free_ticket
+from leetcode_budget import (
+    prioritized,
+    get_usage as get_budget_usage,
+    get_capacity as get_budget_capacity,
+    STREAK,
+    ANNOUNCE,
+    BACKFILL
+)
+from sharding import (
+    SHARDING_ENABLED,
+    HEARTBEAT_INTERVAL,
+    WORKER_ID,
+    filter_owned,
+    owns_user,
+    is_leader,
+    leader_only,
+    refresh_membership,
+    step_down
 )
-from hourly_announcements import load_announcements, save_announcements
 import webserver
 
-user_registry = load_users()
-streak_registry = load_streak()
-bot_config = load_config()
+# Filled in by load_state() while the gateway connects; only ever updated in place
+user_registry = {}
+streak_registry = {}
+bot_config = {}
+guild_members = {}
 
 # Default channel ID (will be overridden by !setchannel)
 DEFAULT_CHANNEL_ID = 1461411340580032565
 
-def get_announcement_channel_id():
+def get_guild_setting(guild_id, key, default=None):
+    """Get a per-guild config value, falling back to the legacy global setting"""
+    if guild_id is not None:
+        guild_config = bot_config.get("guilds", {}).get(str(guild_id), {})
+        if key in guild_config:
+            return guild_config[key]
+    return bot_config.get(key, default)
+
+def set_guild_setting(guild_id, key, value):
+    """Set a per-guild config value (global when outside a guild)"""
+    if guild_id is None:
+        bot_config[key] = value
+    else:
+        bot_config.setdefault("guilds", {}).setdefault(str(guild_id), {})[key] = value
+    save_config(bot_config)
+
+def get_announcement_channel_id(guild_id=None):
     """Get the configured announcement channel ID"""
-    return bot_config.get("announcement_channel_id", DEFAULT_CHANNEL_ID)
+    return get_guild_setting(guild_id, "announcement_channel_id", DEFAULT_CHANNEL_ID)
+
+def get_ctx_guild_id(ctx):
+    """Guild ID a command was run in, or None in DMs"""
+    return str(ctx.guild.id) if ctx.guild else None
+
+def get_scope_registry(guild_id):
+    """Registered users visible in a guild (every user outside guilds / before migration)"""
+    if guild_id is None or not guild_members:
+        return user_registry
+    return {
+        discord_id: user_registry[discord_id]
+        for discord_id in guild_members.get(str(guild_id), [])
+        if discord_id in user_registry
+    }
+
+def get_user_guilds(discord_id):
+    """Guild IDs a user is registered in"""
+    return [guild_id for guild_id, members in guild_members.items() if str(discord_id) in members]
+
+def get_report_scopes():
+    """Return (guild_id, channel, registry) for every guild that receives announcements.
+    
+    Each LeetCode user is polled once; results fan out to every guild they're registered in.
+    """
+    if not guild_members:
+        # Single-server setup from before per-guild registrations
+        channel = bot.get_channel(get_announcement_channel_id())
+        return [(None, channel, user_registry)] if channel else []
+    
+    scopes = []
+    for guild_id in guild_members:
+        channel = bot.get_channel(get_announcement_channel_id(guild_id))
+        # Never let a guild fall back to a channel that belongs to another server
+        if channel is None or (getattr(channel, "guild", None) and str(channel.guild.id) != guild_id):
+            print(f"Announcement channel not found for guild {guild_id}")
+            continue
+        scopes.append((guild_id, channel, get_scope_registry(guild_id)))
+    return scopes
 
 load_dotenv()
 token = os.getenv('DISCORD_TOKEN')
@@ -65,53 +182,189 @@ scheduler = AsyncIOScheduler()
 
 ist = pytz.timezone("Asia/Kolkata")
 MESSAGE_CHUNK_LIMIT = 1800
+DISCORD_MESSAGE_LIMIT = 2000
 MIN_SEND_INTERVAL = 1.0
 MAX_SEND_RETRIES = 5
-_rate_limit_state = {"lock": None, "next_allowed": 0.0}
+# Discord's message-create bucket is 5 per 5s per channel; the global cap is 50 requests/s
+ROUTE_BURST = 5
+ROUTE_WINDOW = 5.0
+GLOBAL_SEND_INTERVAL = 1 / 50
+MAX_IDLE_BUCKETS = 1000
+_rate_limit_state = {"global_lock": None, "global_next_allowed": 0.0, "buckets": {}}
+# Seconds between LeetCode usernames in the submission poll
+SUBMISSION_POLL_DELAY = 0.5
+OUTBOX_POLL_INTERVAL = 5
+OUTBOX_CLAIM_TTL = 120
+OUTBOX_MAX_ATTEMPTS = 10
+OUTBOX_BASE_BACKOFF = 5
+OUTBOX_MAX_BACKOFF = 600
+# LeetCode can lag a few minutes behind the UTC rollover; retry the prefetch until it does
+DAILY_PREFETCH_ATTEMPTS = 10
+DAILY_PREFETCH_RETRY_DELAY = 60
+_outbox_state = {"wakeup": None, "task": None}
+# Max concurrent LeetCode lookups per command invocation
+COMMAND_FETCH_CONCURRENCY = 5
+# Rows per section in !perf
+PERF_TOP_N = 10
+# Min seconds between progressive edits of a slash command response
+SLASH_EDIT_INTERVAL = 1.0
+# (user_id, command) pairs with a slash command still running, and whether the tree is synced
+_slash_state = {"in_flight": set(), "synced": False}
+# Pre-rendered daily challenge, keyed by LeetCode's UTC date
+daily_challenge_cache = {"date": None, "parts": None}
+
+register_gauge_callback("registered_users", "Users with a registered LeetCode username", lambda: len(user_registry))
+register_gauge_callback("streak_entries", "Users with streak data", lambda: len(streak_registry))
+register_gauge_callback("guilds_with_members", "Guilds with at least one registration", lambda: len(guild_members))
+register_gauge_callback("outbox_pending", "Announcement messages waiting in the outbox", count_pending_outbox)
+register_gauge_callback(
+    "leetcode_budget_window_used", "LeetCode requests admitted in the current budget window",
+    lambda: {cls: usage["window_used"] for cls, usage in get_budget_usage().items()}, labelname="class"
+)
+register_gauge_callback(
+    "startup_phase_seconds", "How long each startup phase took", get_phase_timings, labelname="phase"
+)
+register_gauge_callback(
+    "leetcode_budget_waiting", "Callers waiting on the LeetCode request budget",
+    lambda: {cls: usage["waiting"] for cls, usage in get_budget_usage().items()}, labelname="class"
+)
 
 
-async def safe_send(send_callable, *args, **kwargs):
-    """Serialize Discord sends with retries so we respect global rate limits."""
-    loop = asyncio.get_running_loop()
-    if _rate_limit_state["lock"] is None:
-        _rate_limit_state["lock"] = asyncio.Lock()
-    lock = _rate_limit_state["lock"]
-
-    for attempt in range(1, MAX_SEND_RETRIES + 1):
-        async with lock:
-            wait_time = max(0.0, _rate_limit_state["next_allowed"] - loop.time())
+def _route_key(send_callable):
+    """Identify the Discord rate-limit route (channel or DM) a send goes to."""
+    target = getattr(send_callable, "__self__", None)
+    if target is None:
+        return "default"
+
+    # Context / Interaction followups send to their channel
+    channel = getattr(target, "channel", None)
+    if channel is not None and getattr(channel, "id", None) is not None:
+        return f"channel:{channel.id}"
+    if isinstance(target, (discord.User, discord.Member)):
+        return f"dm:{target.id}"
+    if getattr(target, "id", None) is not None:
+        return f"channel:{target.id}"
+    return f"object:{id(target)}"
+
+
+def _get_bucket(route, now):
+    """Return the rate-limit bucket for a route, creating it on first use."""
+    buckets = _rate_limit_state["buckets"]
+    bucket = buckets.get(route)
+    if bucket is None:
+        if len(buckets) >= MAX_IDLE_BUCKETS:
+            # Forget routes that are idle and whose window has passed
+            for key in [k for k, b in buckets.items() if not b["lock"].locked() and b["reset_at"] <= now]:
+                del buckets[key]
+        bucket = {
+            "lock": asyncio.Lock(),
+            "limit": ROUTE_BURST,
+            "remaining": ROUTE_BURST,
+            "reset_at": 0.0,
+        }
+        buckets[route] = bucket
+    return bucket
+
+
+async def _wait_for_global_slot(loop):
+    """Space out requests across all routes to stay under the global limit."""
+    if _rate_limit_state["global_lock"] is None:
+        _rate_limit_state["global_lock"] = asyncio.Lock()
+
+    async with _rate_limit_state["global_lock"]:
+        wait_time = _rate_limit_state["global_next_allowed"] - loop.time()
         if wait_time > 0:
             await asyncio.sleep(wait_time)
+        _rate_limit_state["global_next_allowed"] = loop.time() + GLOBAL_SEND_INTERVAL
+
+
+def _apply_rate_limit_headers(error, bucket, loop, attempt):
+    """Update bucket/global state from a 429 response and return how long to wait."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+
+    reset_after = headers.get("X-RateLimit-Reset-After") or getattr(error, "retry_after", None)
+    try:
+        reset_after = float(reset_after)
+    except (TypeError, ValueError):
+        reset_after = MIN_SEND_INTERVAL * attempt
 
+    limit = headers.get("X-RateLimit-Limit")
+    if limit:
         try:
-            result = await send_callable(*args, **kwargs)
-            async with lock:
-                _rate_limit_state["next_allowed"] = loop.time() + MIN_SEND_INTERVAL
-            return result
-        except discord.errors.HTTPException as e:
-            if e.status != 429:
-                raise
-            retry_after = getattr(e, "retry_after", MIN_SEND_INTERVAL * attempt)
-            print(f"Rate limited by Discord (attempt {attempt}/{MAX_SEND_RETRIES}), waiting {retry_after:.2f}s")
-            async with lock:
-                _rate_limit_state["next_allowed"] = loop.time() + retry_after
-            await asyncio.sleep(retry_after + 0.5)
-        except Exception as e:
-            if attempt == MAX_SEND_RETRIES:
-                raise e
-            await asyncio.sleep(MIN_SEND_INTERVAL * attempt)
+            bucket["limit"] = max(1, int(limit))
+        except ValueError:
+            pass
 
-    raise RuntimeError("safe_send exhausted retries")
+    is_global = str(headers.get("X-RateLimit-Global", "")).lower() == "true" or headers.get("X-RateLimit-Scope") == "global"
+    if is_global:
+        _rate_limit_state["global_next_allowed"] = loop.time() + reset_after
+    else:
+        bucket["remaining"] = 0
+        bucket["reset_at"] = loop.time() + reset_after
+    return reset_after
 
 
-def chunk_messages(messages, limit=MESSAGE_CHUNK_LIMIT):
+async def safe_send(send_callable, *args, **kwargs):
+    """Send with retries through a per-route rate-limit bucket.
+
+    Sends to the same channel/DM stay ordered; sends to different routes run in parallel.
+    """
+    loop = asyncio.get_running_loop()
+    route = _route_key(send_callable)
+    bucket = _get_bucket(route, loop.time())
+
+    # Counts sends waiting on a bucket as well as in flight, i.e. the send queue depth
+    DISCORD_SEND_WAITING.inc()
+    send_span = start_span("discord.send", route=route)
+    send_error = None
+    try:
+        async with bucket["lock"]:
+            for attempt in range(1, MAX_SEND_RETRIES + 1):
+                now = loop.time()
+                if now >= bucket["reset_at"]:
+                    bucket["remaining"] = bucket["limit"]
+                    bucket["reset_at"] = now + ROUTE_WINDOW
+                if bucket["remaining"] <= 0:
+                    await asyncio.sleep(bucket["reset_at"] - now)
+                    bucket["remaining"] = bucket["limit"]
+                    bucket["reset_at"] = loop.time() + ROUTE_WINDOW
+
+                await _wait_for_global_slot(loop)
+                bucket["remaining"] -= 1
+
+                try:
+                    return await send_callable(*args, **kwargs)
+                except discord.errors.HTTPException as e:
+                    if e.status != 429:
+                        raise
+                    retry_after = _apply_rate_limit_headers(e, bucket, loop, attempt)
+                    print(f"Rate limited by Discord (attempt {attempt}/{MAX_SEND_RETRIES}), waiting {retry_after:.2f}s")
+                    DISCORD_SEND_RETRIES.inc(reason="rate_limited")
+                    await asyncio.sleep(retry_after)
+                except Exception as e:
+                    if attempt == MAX_SEND_RETRIES:
+                        raise e
+                    DISCORD_SEND_RETRIES.inc(reason="error")
+                    await asyncio.sleep(MIN_SEND_INTERVAL * attempt)
+
+        raise RuntimeError("safe_send exhausted retries")
+    except Exception as e:
+        send_error = e
+        raise
+    finally:
+        DISCORD_SEND_WAITING.dec()
+        end_span(send_span, send_error)
+
+
+def chunk_messages(messages, limit=MESSAGE_CHUNK_LIMIT, separator="\n\n"):
     """Group multiple announcement strings into Discord-safe chunks."""
     chunk = ""
     for message in messages:
         entry = message.strip()
         if not entry:
             continue
-        addition = entry + "\n\n"
+        addition = entry + separator
         if len(chunk) + len(addition) > limit and chunk:
             yield chunk.strip()
             chunk = addition
@@ -122,31 +375,155 @@ def chunk_messages(messages, limit=MESSAGE_CHUNK_LIMIT):
         yield chunk.strip()
 
 
+def _split_long_line(line, limit):
+    """Split a single line longer than `limit` at word boundaries where possible."""
+    while len(line) > limit:
+        cut = line.rfind(" ", 0, limit)
+        if cut <= 0:
+            cut = limit
+        yield line[:cut]
+        line = line[cut:].lstrip(" ")
+    yield line
+
+
+def paginate_lines(lines, limit=DISCORD_MESSAGE_LIMIT):
+    """Pack lines into pages of at most `limit` characters, breaking only between lines.
+
+    Code fences left open at a page break are closed and reopened on the next page.
+    """
+    fence = "```"
+    pages = []
+    page = []
+    size = 0
+    in_fence = False
+
+    def flush():
+        nonlocal page, size
+        while page and not page[-1].strip():
+            page.pop()
+        if page:
+            if in_fence:
+                page.append(fence)
+            pages.append("\n".join(page))
+        page = [fence] if in_fence else []
+        size = len(fence) + 1 if in_fence else 0
+
+    for raw_line in lines:
+        # Reserve room to close a fence at the end of the page
+        for line in _split_long_line(raw_line, limit - len(fence) - 1):
+            if not page and not line.strip():
+                continue
+            if size + len(line) + len(fence) + 1 > limit:
+                flush()
+                if not page and not line.strip():
+                    continue
+            page.append(line)
+            size += len(line) + 1
+            if line.count(fence) % 2 == 1:
+                in_fence = not in_fence
+
+    in_fence = False
+    flush()
+    return pages
+
+
+async def send_paginated(send_callable, lines):
+    """Send lines as Discord-sized pages through safe_send."""
+    for page in paginate_lines(lines):
+        await safe_send(send_callable, page)
+
+
+def is_summary_report(guild_id=None):
+    """Check whether end-of-day jobs should post only a summary"""
+    return get_guild_setting(guild_id, "report_mode", "full") == "summary"
+
+
+async def send_report(channel, lines):
+    """Send per-user report lines packed into as few messages as possible."""
+    for chunk in chunk_messages(lines, separator="\n"):
+        try:
+            await safe_send(channel.send, chunk)
+        except Exception as e:
+            print(f"Failed to send report chunk: {e}")
+            break
+
+
+def verify_solved_today(discord_id, leetcode_username):
+    """Return True/False for solved today, or None if LeetCode data was stale or missing.
+
+    A stale "solved" is still trusted (solves don't disappear), and so is a solve
+    the submission poller already recorded today. A "solved" from a failed read is
+    not: without the solved-before-today list every re-solve looks like a new problem.
+    """
+    with read_status() as status:
+        solved = has_user_solved_today(leetcode_username)
+    if not status.failed and (solved or not status.stale):
+        return solved
+    if has_known_solve_today(load_user_announcements(discord_id)):
+        return True
+    return None
+
+
+def check_solved_today(registry):
+    """Map discord_id -> solved today (None if unverifiable), querying each LeetCode username only once"""
+    by_username = {}
+    results = {}
+    for discord_id, leetcode_username in registry.items():
+        if leetcode_username not in by_username or by_username[leetcode_username] is None:
+            by_username[leetcode_username] = verify_solved_today(discord_id, leetcode_username)
+        results[discord_id] = by_username[leetcode_username]
+    return results
+
+
+@prioritized(STREAK)
 async def daily_check():
-    channel = bot.get_channel(get_announcement_channel_id())
+    scopes = get_report_scopes()
 
-    if channel is None:
+    if not scopes:
         print("Channel not found")
         return
 
-    await safe_send(channel.send, "📊 **Daily LeetCode Status Check**")
+    solved_map = await asyncio.to_thread(check_solved_today, user_registry)
+
+    for guild_id, channel, registry in scopes:
+        lines = ["📊 **Daily LeetCode Status Check**"]
+        safe_count = 0
+        unknown_count = 0
+
+        for discord_id in registry:
+            mention = f"<@{discord_id}>"
+            solved = solved_map.get(discord_id)
+            if solved:
+                safe_count += 1
+                lines.append(f"✅ {mention} is safe today!")
+            elif solved is None:
+                unknown_count += 1
+                lines.append(f"⚠️ {mention} couldn't be checked (LeetCode unavailable)")
+            else:
+                lines.append(f"❌ {mention} did NOT solve today!")
 
-    for discord_id, leetcode_username in user_registry.items():
-        solved = has_user_solved_today(leetcode_username)
+        if is_summary_report(guild_id):
+            summary = f"✅ {safe_count} safe | ❌ {len(registry) - safe_count - unknown_count} did NOT solve today"
+            if unknown_count:
+                summary += f" | ⚠️ {unknown_count} couldn't be checked"
+            lines = [lines[0], summary]
 
-        mention = f"<@{discord_id}>"
-        if solved:
-            await safe_send(channel.send, f"✅ {mention} is safe today!")
-        else:
-            await safe_send(channel.send, f"❌ {mention} did NOT solve today!")
+        await send_report(channel, lines)
 
 
+@prioritized(STREAK)
 async def streak_update():
-    channel = bot.get_channel(get_announcement_channel_id())
+    scopes = get_report_scopes()
 
-    if channel is None:
+    if not scopes:
         print("Channel not found")
         return
+    
+    # Streaks belong to the user, so update each one once and report it in every guild
+    user_lines = {}
+    extended_users = set()
+    unverified_users = set()
+    solved_cache = {}
     for discord_id, data in user_registry.items():
         if not discord_id in streak_registry:
             streak_registry[discord_id] = get_default_streak_data()
@@ -162,7 +539,16 @@ async def streak_update():
         if already_checked_today(discord_id):
             continue
         else:
-            if has_user_solved_today(leetcode_username):
+            if solved_cache.get(leetcode_username) is None:
+                solved_cache[leetcode_username] = await asyncio.to_thread(
+                    verify_solved_today, discord_id, leetcode_username
+                )
+            if solved_cache[leetcode_username] is None:
+                # Never reset a streak on data we couldn't verify; leave it unchecked
+                mention = f"<@{discord_id}>"
+                unverified_users.add(discord_id)
+                user_lines[discord_id] = f"⚠️ {mention} couldn't be checked (LeetCode unavailable), streak kept at {streak_registry[discord_id]['streak']}🔥"
+            elif solved_cache[leetcode_username]:
                 streak_registry[discord_id]["streak"] = streak_registry[discord_id]["streak"] + 1
                 streak_registry[discord_id]["total_days_solved"] = streak_registry[discord_id].get("total_days_solved", 0) + 1
                 streak = streak_registry[discord_id]["streak"]
@@ -170,14 +556,31 @@ async def streak_update():
                 # Update longest streak
                 update_longest_streak(streak_registry, discord_id)
                 mention = f"<@{discord_id}>"
-                await safe_send(channel.send, f"✅ {mention} is on {streak}🔥 streak!")
+                extended_users.add(discord_id)
+                user_lines[discord_id] = f"✅ {mention} is on {streak}🔥 streak!"
             else:
                 streak_registry[discord_id]["streak"] = 0
                 streak_registry[discord_id]["last_checked_date"] = today
                 streak = streak_registry[discord_id]["streak"]
                 mention = f"<@{discord_id}>"
-                await safe_send(channel.send, f"Oops! {mention} forgot to solve today. The streak is now {streak}🔥")
+                user_lines[discord_id] = f"Oops! {mention} forgot to solve today. The streak is now {streak}🔥"
     save_streak(streak_registry)
+    # Cached profiles show the streak
+    for discord_id in user_lines:
+        invalidate_user(discord_id)
+    
+    for guild_id, channel, registry in scopes:
+        lines = [user_lines[discord_id] for discord_id in registry if discord_id in user_lines]
+        
+        if is_summary_report(guild_id) and lines:
+            extended = sum(1 for discord_id in registry if discord_id in extended_users)
+            unverified = sum(1 for discord_id in registry if discord_id in unverified_users)
+            summary = f"🔥 **Streak Update:** {extended} streak(s) extended | {len(lines) - extended - unverified} reset"
+            if unverified:
+                summary += f" | ⚠️ {unverified} kept (LeetCode unavailable)"
+            lines = [summary]
+        
+        await send_report(channel, lines)
 
 
 
@@ -193,22 +596,34 @@ def already_checked_today(discord_id):
     
     return last_checked_date == today
 
-def sync_user_submissions(discord_id, leetcode_username):
+def fetch_submission_snapshot(leetcode_username):
+    """Fetch what sync_user_submissions needs from LeetCode for one username"""
     from leetcode_logic import get_problems_solved_before_today
     
-    data = load_announcements()
+    return {
+        # Problems that were solved before today (to identify re-solves)
+        "previously_solved": get_problems_solved_before_today(leetcode_username),
+        "submissions": fetch_recent_submissions(leetcode_username)
+    }
 
-    if str(discord_id) not in data:
-        data[str(discord_id)] = []
+def sync_user_submissions(discord_id, leetcode_username, snapshot=None):
+    """Store new accepted submissions for a user and return how many were new
+    
+    Args:
+        snapshot: pre-fetched result of fetch_submission_snapshot, so accounts
+                  sharing a LeetCode username are only polled once
+    """
+    solves = load_user_announcements(discord_id)
 
     existing_timestamps = {
-        entry["timestamp"] for entry in data[str(discord_id)]
+        entry["timestamp"] for entry in solves
     }
 
-    # Get problems that were solved before today (to identify re-solves)
-    previously_solved = get_problems_solved_before_today(leetcode_username)
-
-    submissions = fetch_recent_submissions(leetcode_username)
+    if snapshot is None:
+        snapshot = fetch_submission_snapshot(leetcode_username)
+    previously_solved = snapshot["previously_solved"]
+    submissions = snapshot["submissions"]
+    new_count = 0
 
     for sub in submissions:
         if sub["statusDisplay"] != "Accepted":
@@ -223,32 +638,57 @@ def sync_user_submissions(discord_id, leetcode_username):
         # Mark if this is a re-solve (problem was already solved before today)
         is_resubmit = title_slug in previously_solved
 
-        data[str(discord_id)].append({
+        solves.append({
             "title": sub["title"],
             "titleSlug": title_slug,
             "timestamp": ts,
             "announced": False,
             "is_resubmit": is_resubmit
         })
+        new_count += 1
 
-    save_announcements(data)
+    if new_count:
+        save_user_announcements(discord_id, solves)
+    return new_count
 
+@prioritized(ANNOUNCE)
 async def submission_check_job():
     """Check for new submissions every 5 minutes and announce them"""
-    channel = bot.get_channel(get_announcement_channel_id())
-    if channel is None:
+    scopes = get_report_scopes()
+    if not scopes:
         print("Announcement channel not found")
         return
     
-    # First sync all user submissions from LeetCode API
-    for discord_id, leetcode_username in user_registry.items():
-        sync_user_submissions(discord_id, leetcode_username)
-        await asyncio.sleep(0.5)  # Small delay between API calls
-
-    data = load_announcements()
-    announcement_messages = []
+    # Only poll the users this worker owns (all of them unless sharding is enabled)
+    owned_users = filter_owned(user_registry)
+    
+    # First sync all user submissions from LeetCode API, once per LeetCode username
+    snapshots = {}
+    for discord_id, leetcode_username in owned_users.items():
+        fetched = leetcode_username not in snapshots
+        with span("user", discord_id=discord_id, username=leetcode_username):
+            if fetched:
+                snapshots[leetcode_username] = await asyncio.to_thread(fetch_submission_snapshot, leetcode_username)
+            if await asyncio.to_thread(sync_user_submissions, discord_id, leetcode_username, snapshots[leetcode_username]):
+                # New solve seen - cached !profile/!today/!progress output is outdated
+                invalidate_user(discord_id)
+        if fetched:
+            await asyncio.sleep(SUBMISSION_POLL_DELAY)  # Small delay between API calls
+
+    data = await asyncio.to_thread(load_announcements)
+    user_announcements = {}
+    changed_users = []
+    # Users with a scope to announce to. Solves of anyone else (a guild whose
+    # channel is missing, a DM-only registration) stay pending until one exists,
+    # since marking them announced without an outbox row would lose them
+    reachable = set()
+    for _guild_id, _channel, registry in scopes:
+        reachable.update(registry)
 
     for discord_id, solves in data.items():
+        if not owns_user(discord_id) or discord_id not in reachable:
+            continue
+        
         new_solves = [
             s for s in solves if not s.get("announced", False)
         ]
@@ -256,6 +696,7 @@ async def submission_check_job():
         # Only process if there are new solves
         if not new_solves:
             continue
+        changed_users.append(discord_id)
 
         mention = f"<@{discord_id}>"
         
@@ -266,12 +707,14 @@ async def submission_check_job():
         # Track re-solves as submissions only (not new problems)
         for s in resubmits:
             title_slug = s.get("titleSlug", "")
-            details = fetch_problem_details(title_slug) if title_slug else None
+            details = await asyncio.to_thread(fetch_problem_details, title_slug) if title_slug else None
             if details:
                 diff = details.get("difficulty", "Unknown")
                 q_no = details.get("questionFrontendId", "?")
                 # Track as submission only, not as new problem
-                update_weekly_solve(discord_id, s['title'], title_slug, diff, q_no, is_new_problem=False)
+                await asyncio.to_thread(
+                    update_weekly_solve, discord_id, s['title'], title_slug, diff, q_no, is_new_problem=False
+                )
             s["announced"] = True
         
         # Only announce truly new problems
@@ -282,7 +725,7 @@ async def submission_check_job():
         lines = []
         for s in new_problems:
             title_slug = s.get("titleSlug", "")
-            details = fetch_problem_details(title_slug) if title_slug else None
+            details = await asyncio.to_thread(fetch_problem_details, title_slug) if title_slug else None
             
             if details:
                 q_no = details.get("questionFrontendId", "?")
@@ -291,68 +734,193 @@ async def submission_check_job():
                 lines.append(f"{diff_emoji} #{q_no}. {s['title']} ({diff})")
                 
                 # Track weekly solve as new problem
-                update_weekly_solve(discord_id, s['title'], title_slug, diff, q_no, is_new_problem=True)
+                await asyncio.to_thread(
+                    update_weekly_solve, discord_id, s['title'], title_slug, diff, q_no, is_new_problem=True
+                )
             else:
                 lines.append(f"- {s['title']}")
 
-        announcement_messages.append(
+        user_announcements[discord_id] = (
             f"🔥 {mention} solved {len(new_problems)} problem(s)!\n" + "\n".join(lines)
         )
 
         for s in new_problems:
             s["announced"] = True
 
-    save_announcements(data)
+    # Persist the messages before marking solves announced, so a crash or a
+    # failed send can never lose an announcement (worst case it is sent twice).
+    # Each announcement fans out to every guild the user is registered in.
+    for guild_id, channel, registry in scopes:
+        announcement_messages = [
+            message for discord_id, message in user_announcements.items() if discord_id in registry
+        ]
+        for chunk in chunk_messages(announcement_messages):
+            await asyncio.to_thread(enqueue_outbox, channel.id, chunk)
+
+    for discord_id in changed_users:
+        await asyncio.to_thread(save_user_announcements, discord_id, data[discord_id])
+
+    wake_outbox()
+
+
+def wake_outbox():
+    """Tell the outbox drain task there is new work"""
+    if _outbox_state["wakeup"] is not None:
+        _outbox_state["wakeup"].set()
 
-    for chunk in chunk_messages(announcement_messages):
+
+async def _send_outbox_batch(channel_id, items):
+    """Send one channel's claimed outbox items in order, acknowledging each confirmed send"""
+    channel = bot.get_channel(int(channel_id)) or bot.get_partial_messageable(int(channel_id))
+
+    for index, item in enumerate(items):
         try:
-            await safe_send(channel.send, chunk)
+            await safe_send(channel.send, item["content"])
+        except (discord.errors.Forbidden, discord.errors.NotFound) as e:
+            # Retrying can't help - park it as dead so it stays inspectable
+            print(f"Dropping outbox item {item['_id']} for channel {channel_id}: {e}")
+            await asyncio.to_thread(retry_outbox_item, item["_id"], item.get("attempts", 0) + 1, time.time(), e, True)
+            OUTBOX_RETRIES.inc(outcome="dead")
+            continue
         except Exception as e:
-            print(f"Failed to send announcement chunk: {e}")
-            break
+            attempts = item.get("attempts", 0) + 1
+            dead = attempts >= OUTBOX_MAX_ATTEMPTS
+            next_attempt_at = time.time() + min(OUTBOX_BASE_BACKOFF * 2 ** (attempts - 1), OUTBOX_MAX_BACKOFF)
+            print(f"Failed to send outbox item {item['_id']} (attempt {attempts}/{OUTBOX_MAX_ATTEMPTS}): {e}")
+            await asyncio.to_thread(retry_outbox_item, item["_id"], attempts, next_attempt_at, e, dead)
+            OUTBOX_RETRIES.inc(outcome="dead" if dead else "retry")
+            
+            # Release the rest of this batch; claim_due_outbox won't hand out anything
+            # queued after the failed item until it has been sent, so the channel stays in order
+            for later in items[index + 1:]:
+                await asyncio.to_thread(
+                    retry_outbox_item, later["_id"], later.get("attempts", 0), next_attempt_at, "waiting on earlier message"
+                )
+            return
+
+        await asyncio.to_thread(complete_outbox_item, item["_id"])
+
+
+async def outbox_drain_loop():
+    """Background task that drains the durable outbox at the best allowed send rate"""
+    _outbox_state["wakeup"] = asyncio.Event()
+
+    while True:
+        _outbox_state["wakeup"].clear()
+        try:
+            items = await asyncio.to_thread(claim_due_outbox, WORKER_ID, OUTBOX_CLAIM_TTL)
+        except Exception as e:
+            print(f"Failed to read outbox: {e}")
+            items = []
+
+        if items:
+            by_channel = {}
+            for item in items:
+                by_channel.setdefault(item["channel_id"], []).append(item)
+            # Different channels drain in parallel; safe_send keeps each one within its limits
+            await asyncio.gather(*(
+                _send_outbox_batch(channel_id, batch) for channel_id, batch in by_channel.items()
+            ))
+            continue
+
+        try:
+            await asyncio.wait_for(_outbox_state["wakeup"].wait(), timeout=OUTBOX_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+NUDGE_CONCURRENCY = 10
+NUDGE_MESSAGE = (
+    "⏰ **Friendly Reminder!**\n\n"
+    "Hey! You haven't solved any LeetCode problem today yet.\n"
+    "There's still time before midnight! 💪\n\n"
+    "Keep your streak alive! 🔥"
+)
+
+
+def has_known_solve_today(solves):
+    """Check tracked submissions for a NEW problem solved today (IST), without calling the API"""
+    today = datetime.now(ist).date()
+    for s in solves:
+        if s.get("is_resubmit", False):
+            continue
+        if datetime.fromtimestamp(int(s["timestamp"]), ist).date() == today:
+            return True
+    return False
+
+
+async def get_dm_channel(discord_id, dm_channels):
+    """Resolve a user's DM channel: persisted ID first, then user cache, then REST"""
+    channel_id = dm_channels.get(discord_id)
+    if channel_id:
+        return bot.get_partial_messageable(int(channel_id), type=discord.ChannelType.private)
+
+    user = bot.get_user(int(discord_id))
+    if user is None:
+        user = await bot.fetch_user(int(discord_id))
+    channel = user.dm_channel or await user.create_dm()
+    dm_channels[discord_id] = channel.id
+    return channel
 
 
+@prioritized(ANNOUNCE)
 async def smart_nudge_job():
     """Send DM to users who haven't solved by 9 PM IST"""
-    for discord_id, leetcode_username in user_registry.items():
-        # Retry logic for API reliability
-        solved = has_user_solved_today(leetcode_username)
-        if not solved:
-            # Wait and retry once more to handle temporary API issues
-            await asyncio.sleep(2)
-            solved = has_user_solved_today(leetcode_username)
-        
-        if not solved:
-            try:
-                user = await bot.fetch_user(int(discord_id))
-                if user:
-                    await safe_send(
-                        user.send,
-                        f"⏰ **Friendly Reminder!**\n\n"
-                        f"Hey! You haven't solved any LeetCode problem today yet.\n"
-                        f"There's still time before midnight! 💪\n\n"
-                        f"Keep your streak alive! 🔥"
-                    )
-            except discord.errors.HTTPException as e:
-                if e.status == 429:  # Rate limited
-                    retry_after = getattr(e, 'retry_after', 5)
-                    print(f"Rate limited on nudge, waiting {retry_after} seconds...")
-                    await asyncio.sleep(retry_after + 1)
-                else:
+    known_solves = load_announcements()
+    semaphore = asyncio.Semaphore(NUDGE_CONCURRENCY)
+    dm_channels = load_dm_channels()
+    known_channels = dict(dm_channels)
+
+    async def nudge(discord_id, leetcode_username):
+        async with semaphore:
+            with span("user", discord_id=discord_id, username=leetcode_username):
+                # Already-known solve from the 5-minute poller - nothing to fetch
+                if has_known_solve_today(known_solves.get(discord_id, [])):
+                    return
+            
+                # Not seen yet: refresh this user's tracked submissions once
+                if await asyncio.to_thread(sync_user_submissions, discord_id, leetcode_username):
+                    invalidate_user(discord_id)
+                    if has_known_solve_today(load_user_announcements(discord_id)):
+                        return
+
+                try:
+                    channel = await get_dm_channel(discord_id, dm_channels)
+                    await safe_send(channel.send, NUDGE_MESSAGE)
+                except discord.errors.NotFound:
+                    # Stale DM channel - resolve it again next time
+                    dm_channels.pop(discord_id, None)
+                    print(f"Could not send nudge to {discord_id}: DM channel not found")
+                except Exception as e:
                     print(f"Could not send nudge to {discord_id}: {e}")
-            except Exception as e:
-                print(f"Could not send nudge to {discord_id}: {e}")
+
+    await asyncio.gather(*(
+        nudge(discord_id, leetcode_username)
+        for discord_id, leetcode_username in list(user_registry.items())
+    ))
+
+    if dm_channels != known_channels:
+        save_dm_channels(dm_channels)
 
 
 def get_current_week_start():
     """Get the Monday that starts the current week (IST timezone)"""
+    today = datetime.now(ist).date()
     days_since_monday = today.weekday()
     current_week_start = today - timedelta(days=days_since_monday)
     return current_week_start
 
 
-def ensure_weekly_synced():
-    """Catch up any missed submissions for the current week by checking LeetCode API directly"""
+@prioritized(BACKFILL)
+def ensure_weekly_synced(registry=None):
+    """Catch up any missed submissions for the current week by checking LeetCode API directly
+    
+    Args:
+        registry: users to sync (defaults to every registered user)
+    """
+    if registry is None:
+        registry = user_registry
+
     weekly = load_weekly()
     week_start_str = weekly.get("week_start")
     
@@ -383,9 +951,12 @@ def ensure_weekly_synced():
     except:
         return weekly
     
-    for discord_id, leetcode_username in user_registry.items():
-        # Get this week's solved problems directly from LeetCode
-        problems_this_week = get_weekly_solved_problems(leetcode_username, week_start, today)
+    weekly_problems_cache = {}
+    for discord_id, leetcode_username in registry.items():
+        # Get this week's solved problems directly from LeetCode (once per username)
+        if leetcode_username not in weekly_problems_cache:
+            weekly_problems_cache[leetcode_username] = get_weekly_solved_problems(leetcode_username, week_start, today)
+        problems_this_week = weekly_problems_cache[leetcode_username]
         
         if not problems_this_week:
             continue
@@ -428,10 +999,9 @@ def ensure_weekly_synced():
 
 async def weekly_reset_job():
     """Reset weekly leaderboard on Sunday 11:59 PM"""
-    channel = bot.get_channel(get_announcement_channel_id())
-    if channel:
-        weekly = load_weekly()
-        if weekly["data"]:
+    weekly = load_weekly()
+    for guild_id, channel, registry in get_report_scopes():
+        if any(discord_id in registry for discord_id in weekly["data"]):
             await safe_send(channel.send, "🔄 Weekly leaderboard has been reset! Good luck this week! 💪")
     reset_weekly()
     print("Weekly leaderboard reset")
@@ -439,13 +1009,15 @@ async def weekly_reset_job():
 
 async def weekly_recap_job():
     """Post weekly recap on Sundays"""
-    channel = bot.get_channel(get_announcement_channel_id())
-    if channel is None:
-        return
-    
+    for guild_id, channel, registry in get_report_scopes():
+        await post_weekly_recap(channel, registry)
+
+
+async def post_weekly_recap(channel, registry):
+    """Post the streak recap for one guild's registered users"""
     # Build leaderboard by streak
     streak_leaders = []
-    for discord_id in user_registry.keys():
+    for discord_id in registry.keys():
         if discord_id in streak_registry:
             streak = streak_registry[discord_id].get("streak", 0)
             longest = streak_registry[discord_id].get("longest_streak", 0)
@@ -471,20 +1043,266 @@ async def weekly_recap_job():
     await safe_send(channel.send, msg)
 
 
+def render_daily_challenge(details):
+    """Render the daily challenge into the Discord message pages to send"""
+    q_no = details.get("questionFrontendId", "?")
+    title = details.get("title", "Unknown")
+    difficulty = details.get("difficulty", "Unknown")
+    title_slug = details.get("titleSlug", "")
+    content = details.get("content", "No description available.")
+    tags = details.get("topicTags", [])
+    ac_rate = details.get("acRate", 0)
+    likes = details.get("likes", 0)
+    dislikes = details.get("dislikes", 0)
+    date = details.get("date", "")
+    
+    diff_emoji = {"Easy": "🟢", "Medium": "🟡", "Hard": "🔴"}.get(difficulty, "⚪")
+    tag_str = ", ".join([t["name"] for t in tags[:5]]) if tags else "None"
+    
+    # Convert HTML to Discord markdown, truncated at a clean boundary (cached per slug)
+    description = render_problem_description(title_slug, content)
+    
+    link = f"https://leetcode.com/problems/{title_slug}/"
+    
+    lines = [
+        f"📅 **Daily Challenge** ({date})",
+        "",
+        f"{diff_emoji} **#{q_no}. {title}** ({difficulty})",
+        f"📊 Acceptance: {ac_rate:.1f}% | 👍 {likes} | 👎 {dislikes}",
+        f"🏷️ Tags: {tag_str}",
+        f"🔗 {link}",
+        "",
+        "**Description:**",
+    ]
+    lines += description.split("\n")
+    
+    return paginate_lines(lines)
+
+
+def refresh_daily_challenge():
+    """Fetch and render today's daily challenge, returning the parts (None on failure)"""
+    details = fetch_daily_challenge()
+    if not details:
+        return None
+    
+    parts = render_daily_challenge(details)
+    # LeetCode's daily rolls over at 00:00 UTC and reports the UTC date
+    daily_challenge_cache["date"] = details.get("date") or datetime.now(pytz.utc).date().isoformat()
+    daily_challenge_cache["parts"] = parts
+    return parts
+
+
+def get_daily_challenge_parts():
+    """Return the pre-rendered daily challenge if it is still today's (UTC)"""
+    today_utc = datetime.now(pytz.utc).date().isoformat()
+    if daily_challenge_cache["date"] != today_utc:
+        return None
+    return daily_challenge_cache["parts"]
+
+
+@prioritized(ANNOUNCE)
+async def daily_prefetch_job():
+    """Prefetch and pre-render the daily challenge right after LeetCode's UTC rollover"""
+    for attempt in range(DAILY_PREFETCH_ATTEMPTS):
+        parts = await asyncio.to_thread(refresh_daily_challenge)
+        # A stale answer is still cached under its own date, so it's never served as today's
+        if parts and get_daily_challenge_parts() is not None:
+            break
+        if parts:
+            print(f"LeetCode still reports {daily_challenge_cache['date']} as the daily challenge, retrying")
+        if attempt + 1 < DAILY_PREFETCH_ATTEMPTS:
+            await asyncio.sleep(DAILY_PREFETCH_RETRY_DELAY)
+    else:
+        print("Daily challenge prefetch failed, !daily will refresh on demand")
+        return
+    
+    for guild_id, channel, registry in get_report_scopes():
+        if not get_guild_setting(guild_id, "daily_autopost", False):
+            continue
+        for part in parts:
+            await safe_send(channel.send, part)
+
+
+def assign_unscoped_users():
+    """Attach users registered before per-guild registrations to the guilds they're in"""
+    scoped = {discord_id for members in guild_members.values() for discord_id in members}
+    changed = False
+    for guild in bot.guilds:
+        for discord_id in user_registry:
+            if discord_id in scoped or guild.get_member(int(discord_id)) is None:
+                continue
+            guild_members.setdefault(str(guild.id), []).append(discord_id)
+            changed = True
+    if changed:
+        save_guild_members(guild_members)
+
+
+async def shard_membership_job():
+    """Heartbeat this worker, rebalance shards and pick up registrations made on the leader"""
+    refresh_membership()
+    user_registry.clear()
+    user_registry.update(load_users())
+    guild_members.clear()
+    guild_members.update(load_guild_members())
+    # A worker that just took over leadership registers the slash commands
+    await sync_slash_commands()
+
+
+# ---------- read-only API views ----------
+
+# Seconds between rebuilds of the precomputed API responses
+API_VIEW_REFRESH = 120
+
+
+def load_view_sources():
+    """Storage reads behind the API views; runs in a thread"""
+    return load_announcements(), load_weekly()
+
+
+def _display_name(guild, discord_id):
+    member = guild.get_member(int(discord_id)) if guild else None
+    if member is None:
+        member = bot.get_user(int(discord_id))
+    return member.display_name if member else None
+
+
+def _today_solves(solves, weekly_problems):
+    """New problems solved today (IST) from tracked submissions, with difficulty from the weekly store"""
+    today = datetime.now(ist).date()
+    difficulty_by_slug = {p.get("titleSlug"): p for p in weekly_problems}
+    problems = {}
+    submissions = 0
+    for s in solves:
+        if s.get("is_resubmit", False):
+            continue
+        solved_at = datetime.fromtimestamp(int(s["timestamp"]), ist)
+        if solved_at.date() != today:
+            continue
+        submissions += 1
+        known = difficulty_by_slug.get(s.get("titleSlug"), {})
+        problems.setdefault(s.get("titleSlug"), {
+            "title": s.get("title"),
+            "slug": s.get("titleSlug"),
+            "question_no": known.get("questionNo"),
+            "difficulty": known.get("difficulty"),
+            "solved_at": solved_at.isoformat(),
+        })
+    return list(problems.values()), submissions
+
+
+def _difficulty_counts(problems):
+    counts = {"easy": 0, "medium": 0, "hard": 0}
+    for p in problems:
+        difficulty = (p.get("difficulty") or "").lower()
+        if difficulty in counts:
+            counts[difficulty] += 1
+    return counts
+
+
+def _ranked(entries, *fields):
+    entries.sort(key=lambda e: tuple(e[f] for f in fields), reverse=True)
+    for rank, entry in enumerate(entries, start=1):
+        entry["rank"] = rank
+    return entries
+
+
+def build_api_views(announcements, weekly_data):
+    """Build {kind: {key: payload}} for every guild and user from in-memory and stored data"""
+    today = datetime.now(ist).date().isoformat()
+    weekly_users = weekly_data.get("data", {})
+    views = {"today": {}, "weekly": {}, "streaks": {}, "user": {}}
+
+    guild_ids = set(guild_members) | {str(guild.id) for guild in bot.guilds}
+    for guild_id in guild_ids:
+        guild = bot.get_guild(int(guild_id))
+        registry = get_scope_registry(guild_id)
+        today_rows, weekly_rows, streak_rows = [], [], []
+
+        for discord_id, leetcode_username in registry.items():
+            user = {
+                "discord_id": discord_id,
+                "display_name": _display_name(guild, discord_id),
+                "leetcode_username": leetcode_username,
+            }
+            week = weekly_users.get(discord_id, {})
+            problems, submissions = _today_solves(announcements.get(discord_id, []), week.get("problems", []))
+            if problems:
+                today_rows.append({**user, "unique": len(problems), "submissions": submissions, **_difficulty_counts(problems)})
+            if week:
+                unique = week.get("unique_problems", week.get("count", 0))
+                weekly_rows.append({
+                    **user,
+                    "unique": unique,
+                    "submissions": week.get("submissions", unique),
+                    "easy": week.get("easy", 0),
+                    "medium": week.get("medium", 0),
+                    "hard": week.get("hard", 0),
+                })
+            streak_data = streak_registry.get(discord_id, {})
+            streak_rows.append({
+                **user,
+                "streak": streak_data.get("streak", 0),
+                "longest_streak": streak_data.get("longest_streak", 0),
+                "total_days_solved": streak_data.get("total_days_solved", 0),
+            })
+
+        views["today"][guild_id] = {"guild_id": guild_id, "date": today, "entries": _ranked(today_rows, "unique", "submissions")}
+        views["weekly"][guild_id] = {
+            "guild_id": guild_id,
+            "week_start": weekly_data.get("week_start"),
+            "entries": _ranked(weekly_rows, "unique", "submissions"),
+        }
+        views["streaks"][guild_id] = {"guild_id": guild_id, "entries": _ranked(streak_rows, "streak", "longest_streak")}
+
+    for discord_id, leetcode_username in user_registry.items():
+        week = weekly_users.get(discord_id, {})
+        problems, submissions = _today_solves(announcements.get(discord_id, []), week.get("problems", []))
+        streak_data = streak_registry.get(discord_id, {})
+        views["user"][discord_id] = {
+            "discord_id": discord_id,
+            "display_name": _display_name(None, discord_id),
+            "leetcode_username": leetcode_username,
+            "profile_url": f"https://leetcode.com/{leetcode_username}/",
+            "guilds": get_user_guilds(discord_id),
+            "streak": {
+                "current": streak_data.get("streak", 0),
+                "longest": streak_data.get("longest_streak", 0),
+                "total_days_solved": streak_data.get("total_days_solved", 0),
+            },
+            "today": {"date": today, "unique": len(problems), "submissions": submissions, "problems": problems},
+            "week": {
+                "week_start": weekly_data.get("week_start"),
+                "unique": week.get("unique_problems", week.get("count", 0)),
+                "submissions": week.get("submissions", 0),
+                "easy": week.get("easy", 0),
+                "medium": week.get("medium", 0),
+                "hard": week.get("hard", 0),
+            },
+        }
+    return views
+
+
+async def api_views_job():
+    """Rebuild the precomputed API responses; HTTP requests only ever read these"""
+    announcements, weekly_data = await asyncio.to_thread(load_view_sources)
+    for kind, views in build_api_views(announcements, weekly_data).items():
+        publish_api_views(kind, views)
+
+
 def scheduled_job():
     asyncio.create_task(daily_check())
 
 
 
 scheduler.add_job(
-    daily_check,
+    leader_only(instrument_job(daily_check)),
     "cron",
     hour=23,
     minute=59,
     timezone=ist
 )
 scheduler.add_job(
-    streak_update,
+    leader_only(instrument_job(streak_update)),
     "cron",
     hour=23,
     minute=58,
@@ -492,13 +1310,13 @@ scheduler.add_job(
 )
 # Check for new submissions every 5 minutes
 scheduler.add_job(
-    submission_check_job,
+    instrument_job(submission_check_job),
     trigger="interval",
     minutes=5
 )
 # Smart nudge at 9 PM IST
 scheduler.add_job(
-    smart_nudge_job,
+    leader_only(instrument_job(smart_nudge_job)),
     "cron",
     hour=21,
     minute=0,
@@ -506,16 +1324,37 @@ scheduler.add_job(
 )
 # Weekly recap on Sundays at 10 PM IST
 scheduler.add_job(
-    weekly_recap_job,
+    leader_only(instrument_job(weekly_recap_job)),
     "cron",
     day_of_week="sun",
     hour=22,
     minute=0,
     timezone=ist
 )
+# Prefetch the daily challenge just after LeetCode's 00:00 UTC rollover
+scheduler.add_job(
+    leader_only(instrument_job(daily_prefetch_job)),
+    "cron",
+    hour=0,
+    minute=1,
+    timezone=pytz.utc
+)
+# Keep shard membership and leadership fresh when polling is sharded
+if SHARDING_ENABLED:
+    scheduler.add_job(
+        instrument_job(shard_membership_job),
+        trigger="interval",
+        seconds=HEARTBEAT_INTERVAL
+    )
+# Rebuild the read-only API views on every worker (each one serves HTTP)
+scheduler.add_job(
+    instrument_job(api_views_job),
+    trigger="interval",
+    seconds=API_VIEW_REFRESH
+)
 # Reset weekly leaderboard on Sundays at 11:59 PM IST
 scheduler.add_job(
-    weekly_reset_job,
+    leader_only(instrument_job(weekly_reset_job)),
     "cron",
     day_of_week="sun",
     hour=23,
@@ -523,13 +1362,204 @@ scheduler.add_job(
     timezone=ist
 )
 
+# ---------- health checks (served on /healthz and /readyz) ----------
+
+# A Discord outage longer than this is treated as a wedged gateway connection
+GATEWAY_DOWN_LIMIT = 600
+STORAGE_CHECK_TTL = 15
+_gateway_state = {"disconnected_since": None}
+_storage_health = {"checked_at": 0.0, "result": None, "refresh": None}
+
+# Staleness budgets: a few missed runs for interval jobs, a day plus slack for daily ones
+expect_job("submission_check_job", 3 * 5 * 60)
+expect_job("api_views_job", 3 * API_VIEW_REFRESH)
+expect_job("daily_check", 26 * 3600, active=is_leader)
+expect_job("streak_update", 26 * 3600, active=is_leader)
+expect_job("daily_prefetch_job", 26 * 3600, active=is_leader)
+if SHARDING_ENABLED:
+    expect_job("shard_membership_job", 3 * HEARTBEAT_INTERVAL)
+
+
+def gateway_health():
+    details = {"ready": bot.is_ready(), "closed": bot.is_closed()}
+    if details["ready"] and not details["closed"]:
+        details["latency_ms"] = round(bot.latency * 1000) if math.isfinite(bot.latency) else None
+        return "ok", details
+
+    since = _gateway_state["disconnected_since"]
+    if since is None:
+        # Never connected yet
+        return ("degraded" if in_startup_grace() else "down"), details
+    details["disconnected_for_seconds"] = round(time.monotonic() - since)
+    return ("down" if time.monotonic() - since > GATEWAY_DOWN_LIMIT else "degraded"), details
+
+
+def scheduler_health():
+    if scheduler.running:
+        return "ok", {"running": True, "jobs": len(scheduler.get_jobs())}
+    return ("degraded" if in_startup_grace() else "down"), {"running": False}
+
+
+def refresh_storage_health():
+    _storage_health["result"] = check_storage()
+    _storage_health["checked_at"] = time.monotonic()
+
+
+def storage_health():
+    # Probes run on the bot loop: ping MongoDB in a thread and report the last result
+    stale = time.monotonic() - _storage_health["checked_at"] > STORAGE_CHECK_TTL
+    if stale and _storage_health["refresh"] is None:
+        refresh = asyncio.create_task(asyncio.to_thread(refresh_storage_health))
+        refresh.add_done_callback(lambda _: _storage_health.update(refresh=None))
+        _storage_health["refresh"] = refresh
+    if _storage_health["result"] is None:
+        return "degraded", {"backend": None, "reachable": None}
+    backend, reachable = _storage_health["result"]
+    # Restarting won't bring the database back, so this only fails readiness
+    return ("ok" if reachable else "degraded"), {"backend": backend, "reachable": reachable}
+
+
+def startup_health():
+    if is_loaded():
+        return "ok", {"phases": get_phase_timings()}
+    return ("degraded" if in_startup_grace() else "down"), {"phases": get_phase_timings()}
+
+
+register_check("startup", startup_health)
+register_check("gateway", gateway_health)
+register_check("scheduler", scheduler_health)
+register_check("storage", storage_health)
+
+
+@bot.event
+async def on_disconnect():
+    if _gateway_state["disconnected_since"] is None:
+        _gateway_state["disconnected_since"] = time.monotonic()
+
+
+@bot.event
+async def on_resumed():
+    _gateway_state["disconnected_since"] = None
+
+
+# ---------- startup ----------
+
+STARTUP_RETRY_DELAY = 5
+STARTUP_RETRY_MAX_DELAY = 60
+# How long a command sent during startup waits for registries before giving up
+STARTUP_COMMAND_WAIT = 20
+
+
+class StartupPending(commands.CheckFailure):
+    """A command arrived before registries loaded; the user has been told to retry"""
+
+
+async def load_state():
+    """Load registries and config in parallel threads while the gateway connects"""
+    delay = STARTUP_RETRY_DELAY
+    while True:
+        try:
+            with startup_phase("storage"):
+                backend = await asyncio.to_thread(connect_storage)
+                await asyncio.to_thread(refresh_storage_health)
+            with startup_phase("registries"):
+                users, streaks, config, members = await asyncio.gather(
+                    asyncio.to_thread(load_users),
+                    asyncio.to_thread(load_streak),
+                    asyncio.to_thread(load_config),
+                    asyncio.to_thread(load_guild_members),
+                )
+            break
+        except Exception as e:
+            print(f"Failed to load registries ({e}), retrying in {delay}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, STARTUP_RETRY_MAX_DELAY)
+
+    user_registry.update(users)
+    streak_registry.update(streaks)
+    bot_config.update(config)
+    guild_members.update(members)
+    print(f"Loaded {len(user_registry)} users and {len(guild_members)} guilds from {backend}")
+
+    # Join the shard ring before the first poll
+    if SHARDING_ENABLED:
+        with startup_phase("sharding"):
+            await asyncio.to_thread(refresh_membership)
+    mark_loaded()
+
+
+@bot.check
+async def wait_for_registries(ctx):
+    if await wait_until_loaded(STARTUP_COMMAND_WAIT):
+        return True
+    await safe_send(ctx.send, "⏳ Still starting up, try again in a moment.")
+    raise StartupPending()
+
+
+@bot.event
+async def on_command_error(ctx, error):
+    if isinstance(error, StartupPending):
+        return
+    await commands.Bot.on_command_error(bot, ctx, error)
+
+
+async def sync_slash_commands():
+    """Register the slash commands once, from the leader only, since only the leader answers them"""
+    if _slash_state["synced"] or not is_leader():
+        return
+    try:
+        synced = await bot.tree.sync()
+        _slash_state["synced"] = True
+        print(f"Synced {len(synced)} slash commands")
+    except Exception as e:
+        print(f"Failed to sync slash commands: {e}")
+
 
 @bot.event
 async def on_ready():
     print("Bot is online!")
+    record_since_start("gateway")
+    _gateway_state["disconnected_since"] = None
+
+    # Opt-in (LOOP_WATCHDOG=1): log anything that blocks the loop
+    start_watchdog()
+
+    # Drain queued announcements (including ones left over from before a restart)
+    if _outbox_state["task"] is None:
+        _outbox_state["task"] = asyncio.create_task(outbox_drain_loop())
+
+    # Jobs and guild scoping need the registries, which load alongside the gateway connect
+    await wait_until_loaded()
+
+    if is_leader():
+        assign_unscoped_users()
 
     if not scheduler.running:
         scheduler.start()
+        # Build the API views now rather than one refresh interval from now
+        asyncio.create_task(instrument_job(api_views_job)())
+
+    # Warm the daily challenge so the first !daily replies instantly
+    if get_daily_challenge_parts() is None:
+        asyncio.create_task(asyncio.to_thread(refresh_daily_challenge))
+
+    await sync_slash_commands()
+
+    if "ready" not in get_phase_timings():
+        record_since_start("ready")
+        print(f"Startup: {format_phase_timings()}")
+
+
+@bot.before_invoke
+async def start_command_span(ctx):
+    ctx.trace_span = start_span("command", command=ctx.command.qualified_name, guild_id=get_ctx_guild_id(ctx))
+
+
+@bot.after_invoke
+async def end_command_span(ctx):
+    trace_span = getattr(ctx, "trace_span", None)
+    if trace_span is not None:
+        end_span(trace_span, "command failed" if ctx.command_failed else None)
 
 
 @bot.event
@@ -541,6 +1571,10 @@ async def on_message(message):
     if message.author == bot.user:
         return
     
+    # With sharded polling every worker sees every message; only the leader responds
+    if not is_leader():
+        return
+    
     if "shit" in message.content.lower():
         await message.delete()
         await safe_send(message.channel.send, f"{message.author.mention}- Hey, dont use that word! ")
@@ -593,8 +1627,16 @@ async def dm(ctx, member: discord.Member, *, content: str):
         
 @bot.command()
 async def register(ctx, leetcode_username):
-    user_registry[str(ctx.author.id)] = leetcode_username
+    user_id = str(ctx.author.id)
+    user_registry[user_id] = leetcode_username
     save_users(user_registry)
+    
+    guild_id = get_ctx_guild_id(ctx)
+    if guild_id is not None and user_id not in guild_members.get(guild_id, []):
+        guild_members.setdefault(guild_id, []).append(user_id)
+        save_guild_members(guild_members)
+    
+    invalidate_user(ctx.author.id)
     await ctx.send(f"✅ Registered **{leetcode_username}**")
 
 @bot.command()
@@ -617,51 +1659,131 @@ async def status(ctx):
         await ctx.send("You are not registered yet.")
         return
 
-    if has_user_solved_today(user_registry[user_id]):
+    if await asyncio.to_thread(has_user_solved_today, user_registry[user_id]):
         await ctx.send("You are safe today!")
     else:
         await ctx.send("You haven't solved today!")
 
-@bot.command()
-async def leaderboard(ctx):
-    """Show today's leaderboard with unique problems and submissions"""
-    results = []
+def stale_notice(status):
+    """Footer for output built from stale or missing LeetCode data, or None if it was all fresh"""
+    if status.stale:
+        minutes = max(1, round(status.max_age / 60))
+        return f"⚠️ _LeetCode is slow or down, some data is from {minutes} min ago_"
+    if status.failed:
+        return "⚠️ _LeetCode is unavailable, some results may be missing_"
+    return None
+
+
+def with_stale_notice(lines, status):
+    notice = stale_notice(status)
+    return lines + ["", notice] if notice else lines
 
-    for discord_id, lc_username in user_registry.items():
-        stats = get_today_stats(lc_username)
-        results.append((
-            discord_id,
-            stats["unique"],
-            stats["submissions"],
-            stats["easy"],
-            stats["medium"],
-            stats["hard"]
-        ))
+
+async def start_limited(command, user_id, guild_id, user_count, reply, scope=None):
+    """Charge a command against its cooldowns; reply with the wait and return None if limited.
+
+    Check the command cache first. With scope, a call that will just join an
+    identical computation already in flight (see single_flight) is not charged.
+    """
+    if scope is not None and is_in_flight(command, scope):
+        return free_ticket(command)
+    ticket, retry_after = start_command(command, user_id, guild_id, user_count)
+    if ticket is None:
+        await reply(f"⏳ `{command}` is busy right now, try again in {math.ceil(retry_after)}s.")
+    return ticket
+
+
+async def gather_per_user(registry, fetch, on_progress=None):
+    """Run a blocking per-LeetCode-username fetch in threads, once per username.
+    
+    on_progress, if given, is awaited with {discord_id: result} for the users loaded so far.
+    """
+    semaphore = asyncio.Semaphore(COMMAND_FETCH_CONCURRENCY)
+    by_username = {}
+
+    def loaded_users():
+        return {
+            discord_id: by_username[lc_username]
+            for discord_id, lc_username in registry.items()
+            if lc_username in by_username
+        }
+
+    async def run(lc_username):
+        async with semaphore:
+            by_username[lc_username] = await asyncio.to_thread(fetch, lc_username)
+        if on_progress is not None:
+            await on_progress(loaded_users())
+
+    await asyncio.gather(*(run(lc_username) for lc_username in set(registry.values())))
+    return loaded_users()
+
+
+def render_leaderboard_lines(stats_by_user, total_users=None):
+    """Render today's leaderboard; total_users marks a partial result still loading"""
+    results = [
+        (discord_id, stats["unique"], stats["submissions"], stats["easy"], stats["medium"], stats["hard"])
+        for discord_id, stats in stats_by_user.items()
+    ]
 
     # Sort by unique problems first, then submissions as tiebreaker
     results.sort(key=lambda x: (x[1], x[2]), reverse=True)
 
-    if not results:
-        await ctx.send("No registered users.")
-        return  
-
     ist = pytz.timezone("Asia/Kolkata")
     today_str = datetime.now(ist).strftime("%B %d, %Y")
     
-    msg = f"🏆 **Today's Leaderboard** ({today_str})\n\n"
+    lines = [f"🏆 **Today's Leaderboard** ({today_str})", ""]
     
     medals = ["🥇", "🥈", "🥉"]
     
-    for i, (discord_id, unique, submissions, easy, medium, hard) in enumerate(results[:10]):
+    for i, (discord_id, unique, submissions, easy, medium, hard) in enumerate(results):
         medal = medals[i] if i < 3 else f"{i+1}."
         breakdown = f"🟢{easy} 🟡{medium} 🔴{hard}"
-        msg += f"{medal} <@{discord_id}> — **{unique}** problems solved ({submissions} submissions) | {breakdown}\n"
+        lines.append(f"{medal} <@{discord_id}> — **{unique}** problems solved ({submissions} submissions) | {breakdown}")
+
+    if total_users is not None:
+        lines += ["", f"⏳ Loaded {len(results)}/{total_users} users..."]
+        return lines
 
     total_unique = sum(r[1] for r in results)
     total_subs = sum(r[2] for r in results)
-    msg += f"\n---\n**Total today:** {total_unique} problems solved ({total_subs} submissions) by {len(results)} users"
+    lines += ["", "---", f"**Total today:** {total_unique} problems solved ({total_subs} submissions) by {len(results)} users"]
+    return lines
 
-    await ctx.send(msg)
+
+async def build_leaderboard_lines(guild_id, registry, on_partial=None):
+    """Compute today's leaderboard for a guild, reporting partial boards to on_partial.
+
+    Concurrent calls for the same guild share one computation.
+    """
+    async def compute(broadcast):
+        async def progress(partial):
+            await broadcast(render_leaderboard_lines(partial, total_users=len(registry)))
+
+        with read_status() as status:
+            stats = await gather_per_user(registry, get_today_stats, progress)
+        return with_stale_notice(render_leaderboard_lines(stats), status)
+
+    return await coalesce("leaderboard", guild_id, compute, on_partial)
+
+
+@bot.command()
+async def leaderboard(ctx):
+    """Show today's leaderboard with unique problems and submissions"""
+    guild_id = get_ctx_guild_id(ctx)
+    registry = get_scope_registry(guild_id)
+
+    if not registry:
+        await ctx.send("No registered users.")
+        return  
+
+    ticket = await start_limited("leaderboard", ctx.author.id, guild_id, len(registry), ctx.send, scope=guild_id)
+    if ticket is None:
+        return
+    try:
+        lines = await build_leaderboard_lines(guild_id, registry)
+    finally:
+        finish_command(ticket)
+    await send_paginated(ctx.send, lines)
 
 @bot.command()
 async def streak(ctx):
@@ -697,29 +1819,45 @@ async def unregister(ctx):
         return
 
     username = user_registry[user_id]
+    guild_id = get_ctx_guild_id(ctx)
+    
+    # Before per-guild registrations every user belongs to every server
+    if guild_id is not None and guild_members:
+        if user_id not in guild_members.get(guild_id, []):
+            await ctx.send("❌ You are not registered in this server.")
+            return
+        
+        guild_members[guild_id].remove(user_id)
+        if not guild_members[guild_id]:
+            del guild_members[guild_id]
+        save_guild_members(guild_members)
+        invalidate_user(user_id)
+        
+        # Still registered elsewhere - keep the LeetCode link and streak
+        if get_user_guilds(user_id):
+            await ctx.send(f"✅ Unregistered **{username}** from this server.")
+            return
+    
+    # Removing the user for good (from DMs, or their last server): leave every server
+    if get_user_guilds(user_id):
+        for members in guild_members.values():
+            if user_id in members:
+                members.remove(user_id)
+        for empty_guild in [g for g, members in guild_members.items() if not members]:
+            del guild_members[empty_guild]
+        save_guild_members(guild_members)
+    
     remove_user(user_registry, streak_registry, user_id)
+    invalidate_user(user_id)
     
     await ctx.send(f"✅ Unregistered **{username}**. Your data has been removed.")
 
-@bot.command()
-async def profile(ctx, member: discord.Member = None):
-    """View your or another user's profile"""
-    if member is None:
-        member = ctx.author
-    
-    user_id = str(member.id)
-
-    if user_id not in user_registry:
-        if member == ctx.author:
-            await ctx.send("❌ You are not registered yet. Use `!register <leetcode_username>`")
-        else:
-            await ctx.send(f"❌ {member.display_name} is not registered.")
-        return
-
+async def build_profile_message(display_name, user_id, on_partial=None):
+    """Build a user's profile, reporting the partially built message to on_partial"""
     leetcode_username = user_registry[user_id]
     
     # Build profile message
-    msg = f"📊 **Profile: {member.display_name}**\n\n"
+    msg = f"📊 **Profile: {display_name}**\n\n"
     msg += f"**LeetCode:** [{leetcode_username}](https://leetcode.com/{leetcode_username}/)\n\n"
     
     # Streak info
@@ -732,32 +1870,75 @@ async def profile(ctx, member: discord.Member = None):
     else:
         msg += f"🔥 **Streak:** 0 days\n\n"
     
-    # Difficulty breakdown
-    breakdown = get_difficulty_breakdown(leetcode_username)
-    msg += f"📈 **Problems Solved:**\n"
-    msg += f"🟢 Easy: **{breakdown.get('Easy', 0)}**\n"
-    msg += f"🟡 Medium: **{breakdown.get('Medium', 0)}**\n"
-    msg += f"🔴 Hard: **{breakdown.get('Hard', 0)}**\n"
-    msg += f"📊 Total: **{breakdown.get('All', 0)}**\n\n"
-    
-    # Ranking
-    ranking = get_user_ranking(leetcode_username)
-    if ranking:
-        msg += f"🏅 **Global Ranking:** #{ranking:,}\n\n"
-    
-    # Today's solves
-    solved_today = has_user_solved_today(leetcode_username)
-    if solved_today:
-        msg += "✅ **Solved today!**"
-        problems = get_today_solved_with_difficulty(leetcode_username)
-        if problems:
-            msg += "\n\n**Today's Problems:**\n"
-            for p in problems:
-                diff_emoji = {"Easy": "🟢", "Medium": "🟡", "Hard": "🔴"}.get(p.get("difficulty", ""), "⚪")
-                msg += f"{diff_emoji} #{p.get('questionNo', '?')}. [{p['title']}]({p['link']}) at {p['time']}\n"
-    else:
-        msg += "❌ **Not solved today**"
+    if on_partial is not None:
+        await on_partial(msg + "⏳ Loading stats...")
+    
+    with read_status() as status:
+        # Difficulty breakdown
+        breakdown = await asyncio.to_thread(get_difficulty_breakdown, leetcode_username)
+        msg += f"📈 **Problems Solved:**\n"
+        msg += f"🟢 Easy: **{breakdown.get('Easy', 0)}**\n"
+        msg += f"🟡 Medium: **{breakdown.get('Medium', 0)}**\n"
+        msg += f"🔴 Hard: **{breakdown.get('Hard', 0)}**\n"
+        msg += f"📊 Total: **{breakdown.get('All', 0)}**\n\n"
+    
+        # Ranking
+        ranking = await asyncio.to_thread(get_user_ranking, leetcode_username)
+        if ranking:
+            msg += f"🏅 **Global Ranking:** #{ranking:,}\n\n"
+    
+        if on_partial is not None:
+            await on_partial(msg + "⏳ Checking today's solves...")
+    
+        # Today's solves
+        solved_today = await asyncio.to_thread(has_user_solved_today, leetcode_username)
+        if solved_today:
+            msg += "✅ **Solved today!**"
+            problems = await asyncio.to_thread(get_today_solved_with_difficulty, leetcode_username)
+            if problems:
+                msg += "\n\n**Today's Problems:**\n"
+                for p in problems:
+                    diff_emoji = {"Easy": "🟢", "Medium": "🟡", "Hard": "🔴"}.get(p.get("difficulty", ""), "⚪")
+                    msg += f"{diff_emoji} #{p.get('questionNo', '?')}. [{p['title']}]({p['link']}) at {p['time']}\n"
+        else:
+            msg += "❌ **Not solved today**"
+
+    notice = stale_notice(status)
+    if notice:
+        # Don't cache degraded output; the next call should try LeetCode again
+        return f"{msg}\n\n{notice}"
+
+    set_cached("profile", (user_id,), msg, users=[user_id])
+    return msg
+
+
+@bot.command()
+async def profile(ctx, member: discord.Member = None):
+    """View your or another user's profile"""
+    if member is None:
+        member = ctx.author
+    
+    user_id = str(member.id)
+
+    if user_id not in user_registry:
+        if member == ctx.author:
+            await ctx.send("❌ You are not registered yet. Use `!register <leetcode_username>`")
+        else:
+            await ctx.send(f"❌ {member.display_name} is not registered.")
+        return
+
+    cached = get_cached("profile", user_id)
+    if cached is not None:
+        await ctx.send(cached)
+        return
 
+    ticket = await start_limited("profile", ctx.author.id, get_ctx_guild_id(ctx), 1, ctx.send)
+    if ticket is None:
+        return
+    try:
+        msg = await build_profile_message(member.display_name, user_id)
+    finally:
+        finish_command(ticket)
     await ctx.send(msg)
 
 @bot.command()
@@ -769,19 +1950,36 @@ async def today(ctx):
         await ctx.send("❌ You are not registered yet. Use `!register <leetcode_username>`")
         return
 
+    cached = get_cached("today", user_id)
+    if cached is not None:
+        await ctx.send(cached)
+        return
+
+    ticket = await start_limited("today", ctx.author.id, get_ctx_guild_id(ctx), 1, ctx.send)
+    if ticket is None:
+        return
     leetcode_username = user_registry[user_id]
-    problems = get_today_solved_with_difficulty(leetcode_username)
+    try:
+        with read_status() as status:
+            problems = await asyncio.to_thread(get_today_solved_with_difficulty, leetcode_username)
+    finally:
+        finish_command(ticket)
     
     if not problems:
-        await ctx.send("❌ You haven't solved any new problems today.")
-        return
-    
-    msg = f"✅ **Today's Solves ({len(problems)} problems)**\n\n"
+        msg = "❌ You haven't solved any new problems today."
+    else:
+        msg = f"✅ **Today's Solves ({len(problems)} problems)**\n\n"
+        
+        for p in problems:
+            diff_emoji = {"Easy": "🟢", "Medium": "🟡", "Hard": "🔴"}.get(p.get("difficulty", ""), "⚪")
+            msg += f"{diff_emoji} **{p.get('difficulty', 'Unknown')}** — #{p.get('questionNo', '?')}. [{p['title']}]({p['link']}) at {p['time']}\n"
     
-    for p in problems:
-        diff_emoji = {"Easy": "🟢", "Medium": "🟡", "Hard": "🔴"}.get(p.get("difficulty", ""), "⚪")
-        msg += f"{diff_emoji} **{p.get('difficulty', 'Unknown')}** — #{p.get('questionNo', '?')}. [{p['title']}]({p['link']}) at {p['time']}\n"
+    notice = stale_notice(status)
+    if notice:
+        await ctx.send(f"{msg}\n\n{notice}")
+        return
     
+    set_cached("today", (user_id,), msg, users=[user_id])
     await ctx.send(msg)
 
 @bot.command()
@@ -789,7 +1987,7 @@ async def streakboard(ctx):
     """Show streak leaderboard"""
     results = []
 
-    for discord_id in user_registry.keys():
+    for discord_id in get_scope_registry(get_ctx_guild_id(ctx)).keys():
         if discord_id in streak_registry:
             current = streak_registry[discord_id].get("streak", 0)
             longest = streak_registry[discord_id].get("longest_streak", 0)
@@ -816,11 +2014,11 @@ async def streakboard(ctx):
 @commands.has_permissions(administrator=True)
 async def setchannel(ctx, channel: discord.TextChannel = None):
     """Set the announcement channel (Admin only)"""
-    global bot_config
+    guild_id = get_ctx_guild_id(ctx)
     
     if channel is None:
         # Show current channel
-        current_id = get_announcement_channel_id()
+        current_id = get_announcement_channel_id(guild_id)
         current_channel = bot.get_channel(current_id)
         if current_channel:
             await ctx.send(f"📢 Current announcement channel: {current_channel.mention}")
@@ -828,8 +2026,7 @@ async def setchannel(ctx, channel: discord.TextChannel = None):
             await ctx.send(f"📢 Current channel ID: `{current_id}` (channel not found)")
         return
     
-    bot_config["announcement_channel_id"] = channel.id
-    save_config(bot_config)
+    set_guild_setting(guild_id, "announcement_channel_id", channel.id)
     await ctx.send(f"✅ Announcement channel set to {channel.mention}")
 
 @setchannel.error
@@ -838,112 +2035,237 @@ async def setchannel_error(ctx, error):
         await ctx.send("❌ You need administrator permissions to use this command.")
 
 @bot.command()
-async def progress(ctx):
-    """Show today's progress for all registered users"""
-    if not user_registry:
-        await ctx.send("❌ No registered users yet.")
+@commands.has_permissions(administrator=True)
+async def budget(ctx):
+    """Show LeetCode request budget usage per priority class (Admin only)"""
+    lines = [f"📡 **LeetCode Request Budget** ({get_budget_capacity()} requests per window)", ""]
+    for cls, usage in get_budget_usage().items():
+        lines.append(
+            f"**{cls}** — {usage['window_used']}/{usage['guaranteed']} guaranteed this window | "
+            f"{usage['requests']} total ({usage['borrowed']} borrowed) | "
+            f"{usage['waiting']} waiting | {usage['wait_seconds']:.1f}s spent waiting"
+        )
+    await send_paginated(ctx.send, lines)
+
+@budget.error
+async def budget_error(ctx, error):
+    if isinstance(error, commands.MissingPermissions):
+        await ctx.send("❌ You need administrator permissions to use this command.")
+
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def perf(ctx, minutes: int = 60):
+    """Summarize the slowest recent jobs, commands and calls (Admin only)"""
+    spans = get_recent_spans(since_seconds=minutes * 60)
+    if not spans:
+        await ctx.send(f"⏱️ No spans recorded in the last {minutes} min.")
         return
     
+    lines = [f"⏱️ **Performance** (last {minutes} min, {len(spans)} spans)", "", "**Slowest span types (p95):**"]
+    for s in summarize_spans(spans)[:PERF_TOP_N]:
+        lines.append(
+            f"`{s['name']}` — p50 {s['p50_ms']:.0f}ms | p95 {s['p95_ms']:.0f}ms | max {s['max_ms']:.0f}ms ({s['count']}x)"
+        )
+    
+    lines += ["", "**Slowest spans:**"]
+    for s in sorted(spans, key=lambda s: s["duration_ms"], reverse=True)[:PERF_TOP_N]:
+        attrs = ", ".join(f"{k}={v}" for k, v in s.get("attrs", {}).items())
+        error = " ❌" if s.get("error") else ""
+        lines.append(f"`{s['name']}` {s['duration_ms']:.0f}ms{error}" + (f" ({attrs})" if attrs else ""))
+    
+    await send_paginated(ctx.send, lines)
+
+@perf.error
+async def perf_error(ctx, error):
+    if isinstance(error, commands.MissingPermissions):
+        await ctx.send("❌ You need administrator permissions to use this command.")
+
+def render_progress_lines(problems_by_user, total_users, loading=False):
+    """Render today's progress; loading marks a partial result"""
     ist = pytz.timezone("Asia/Kolkata")
     today_str = datetime.now(ist).strftime("%B %d, %Y")
     
-    msg = f"📊 **Today's Progress** ({today_str})\n\n"
+    lines = [f"📊 **Today's Progress** ({today_str})", ""]
     
     total_problems = 0
     users_solved = 0
     
-    user_progress = []
-    
-    for discord_id, leetcode_username in user_registry.items():
-        problems = get_today_solved_with_difficulty(leetcode_username)
-        user_progress.append((discord_id, leetcode_username, problems))
+    user_progress = list(problems_by_user.items())
+    for discord_id, problems in user_progress:
         if problems:
             users_solved += 1
             total_problems += len(problems)
     
     # Sort by number of problems solved (descending)
-    user_progress.sort(key=lambda x: len(x[2]), reverse=True)
+    user_progress.sort(key=lambda x: len(x[1]), reverse=True)
     
-    for i, (discord_id, lc_username, problems) in enumerate(user_progress, 1):
+    for i, (discord_id, problems) in enumerate(user_progress, 1):
         if problems:
-            msg += f"**{i}. <@{discord_id}>** — {len(problems)} problem(s)\n"
+            lines.append(f"**{i}. <@{discord_id}>** — {len(problems)} problem(s)")
             for p in problems:
                 diff_emoji = {"Easy": "🟢", "Medium": "🟡", "Hard": "🔴"}.get(p.get("difficulty", ""), "⚪")
-                msg += f"   {diff_emoji} #{p.get('questionNo', '?')}. {p['title']} ({p.get('difficulty', 'Unknown')}) at {p['time']}\n"
-            msg += "\n"
+                lines.append(f"   {diff_emoji} #{p.get('questionNo', '?')}. {p['title']} ({p.get('difficulty', 'Unknown')}) at {p['time']}")
         else:
-            msg += f"**{i}. <@{discord_id}>** — ❌ Not solved yet\n\n"
+            lines.append(f"**{i}. <@{discord_id}>** — ❌ Not solved yet")
+        lines.append("")
     
-    msg += f"---\n**Total:** {total_problems} problem(s) solved by {users_solved}/{len(user_registry)} users"
+    if loading:
+        lines.append(f"⏳ Loaded {len(user_progress)}/{total_users} users...")
+        return lines
     
-    await ctx.send(msg)
+    lines += ["---", f"**Total:** {total_problems} problem(s) solved by {users_solved}/{total_users} users"]
+    return lines
+
+
+async def build_progress_lines(guild_id, registry, on_partial=None):
+    """Compute today's progress for a guild's registry, reporting partial output to on_partial.
+
+    Concurrent calls for the same guild share one computation. Callers check the
+    "progress" command cache first.
+    """
+    async def compute(broadcast):
+        async def progress(partial):
+            await broadcast(render_progress_lines(partial, len(registry), loading=True))
+
+        with read_status() as status:
+            problems = await gather_per_user(registry, get_today_solved_with_difficulty, progress)
+        lines = render_progress_lines(problems, len(registry))
+        if status.degraded:
+            return with_stale_notice(lines, status)
+        set_cached("progress", (guild_id,), lines, users=ALL_USERS)
+        return lines
+
+    return await coalesce("progress", guild_id, compute, on_partial)
+
+
+@bot.command()
+async def progress(ctx):
+    """Show today's progress for all registered users"""
+    guild_id = get_ctx_guild_id(ctx)
+    registry = get_scope_registry(guild_id)
+    if not registry:
+        await ctx.send("❌ No registered users yet.")
+        return
+    
+    cached = get_cached("progress", guild_id)
+    if cached is not None:
+        await send_paginated(ctx.send, cached)
+        return
+    
+    ticket = await start_limited("progress", ctx.author.id, guild_id, len(registry), ctx.send, scope=guild_id)
+    if ticket is None:
+        return
+    try:
+        lines = await build_progress_lines(guild_id, registry)
+    finally:
+        finish_command(ticket)
+    await send_paginated(ctx.send, lines)
 
 @bot.command()
 async def users(ctx):
     """Show all registered users"""
-    if not user_registry:
+    registry = get_scope_registry(get_ctx_guild_id(ctx))
+    if not registry:
         await ctx.send("❌ No registered users yet.")
         return
     
-    msg = "👥 **Registered Users**\n\n"
+    lines = ["👥 **Registered Users**", ""]
     
-    for i, (discord_id, lc_username) in enumerate(user_registry.items(), 1):
-        msg += f"{i}. <@{discord_id}> → [{lc_username}](https://leetcode.com/{lc_username}/)\n"
+    for i, (discord_id, lc_username) in enumerate(registry.items(), 1):
+        lines.append(f"{i}. <@{discord_id}> → [{lc_username}](https://leetcode.com/{lc_username}/)")
     
-    msg += f"\n**Total:** {len(user_registry)} users"
+    lines += ["", f"**Total:** {len(registry)} users"]
     
-    await ctx.send(msg)
+    await send_paginated(ctx.send, lines)
+
+async def build_weekly_lines(guild_id, registry):
+    """Sync and render a guild's weekly leaderboard, or None if nobody solved yet.
+
+    Concurrent calls for the same guild share one sync.
+    """
+    async def compute(broadcast):
+        # Sync any missed submissions before displaying
+        with read_status() as status:
+            weekly_data = await asyncio.to_thread(ensure_weekly_synced, registry)
+        guild_weekly = {
+            discord_id: data for discord_id, data in weekly_data["data"].items() if discord_id in registry
+        }
+        
+        if not guild_weekly:
+            return None
+        
+        # Sort by unique problems (primary), then submissions (secondary)
+        results = []
+        for discord_id, data in guild_weekly.items():
+            # Support both old 'count' field and new 'unique_problems' field
+            unique = data.get("unique_problems", data.get("count", 0))
+            submissions = data.get("submissions", unique)  # fallback to unique if no submissions tracked
+            results.append((
+                discord_id, 
+                unique,
+                submissions,
+                data.get("easy", 0),
+                data.get("medium", 0),
+                data.get("hard", 0)
+            ))
+        
+        results.sort(key=lambda x: (x[1], x[2]), reverse=True)
+        
+        week_start = weekly_data.get("week_start", "Unknown")
+        lines = ["📅 **Weekly Leaderboard**", f"_(Week starting: {week_start})_", ""]
+        
+        medals = ["🥇", "🥈", "🥉"]
+        
+        for i, (discord_id, unique, submissions, easy, medium, hard) in enumerate(results):
+            medal = medals[i] if i < 3 else f"{i+1}."
+            breakdown = f"🟢{easy} 🟡{medium} 🔴{hard}"
+            lines.append(f"{medal} <@{discord_id}> — **{unique}** problems solved ({submissions} submissions) | {breakdown}")
+        
+        total_unique = sum(r[1] for r in results)
+        total_subs = sum(r[2] for r in results)
+        lines += ["", "---", f"**Total this week:** {total_unique} problems solved ({total_subs} submissions) by {len(results)} users"]
+        return with_stale_notice(lines, status)
+
+    return await coalesce("weekly", guild_id, compute)
+
 
 @bot.command()
 async def weekly(ctx):
     """Show weekly leaderboard (resets every Sunday 11:59 PM IST)"""
-    # Sync any missed submissions before displaying
-    weekly_data = ensure_weekly_synced()
-    
-    if not weekly_data["data"]:
+    guild_id = get_ctx_guild_id(ctx)
+    registry = get_scope_registry(guild_id)
+    ticket = await start_limited("weekly", ctx.author.id, guild_id, len(registry), ctx.send, scope=guild_id)
+    if ticket is None:
+        return
+    try:
+        lines = await build_weekly_lines(guild_id, registry)
+    finally:
+        finish_command(ticket)
+    if lines is None:
         await ctx.send("📅 No problems solved this week yet!")
         return
     
-    # Sort by unique problems (primary), then submissions (secondary)
-    results = []
-    for discord_id, data in weekly_data["data"].items():
-        # Support both old 'count' field and new 'unique_problems' field
-        unique = data.get("unique_problems", data.get("count", 0))
-        submissions = data.get("submissions", unique)  # fallback to unique if no submissions tracked
-        results.append((
-            discord_id, 
-            unique,
-            submissions,
-            data.get("easy", 0),
-            data.get("medium", 0),
-            data.get("hard", 0)
-        ))
-    
-    results.sort(key=lambda x: (x[1], x[2]), reverse=True)
-    
-    week_start = weekly_data.get("week_start", "Unknown")
-    msg = f"📅 **Weekly Leaderboard**\n_(Week starting: {week_start})_\n\n"
-    
-    medals = ["🥇", "🥈", "🥉"]
-    
-    for i, (discord_id, unique, submissions, easy, medium, hard) in enumerate(results[:10]):
-        medal = medals[i] if i < 3 else f"{i+1}."
-        breakdown = f"🟢{easy} 🟡{medium} 🔴{hard}"
-        msg += f"{medal} <@{discord_id}> — **{unique}** problems solved ({submissions} submissions) | {breakdown}\n"
-    
-    total_unique = sum(r[1] for r in results)
-    total_subs = sum(r[2] for r in results)
-    msg += f"\n---\n**Total this week:** {total_unique} problems solved ({total_subs} submissions) by {len(results)} users"
-    
-    await ctx.send(msg)
+    await send_paginated(ctx.send, lines)
 
 
 @bot.command()
 async def problem(ctx, question_no: int):
     """Display full description of a LeetCode problem by question number"""
+    cached = get_cached("problem", question_no)
+    if cached is not None:
+        await send_paginated(ctx.send, cached)
+        return
+
+    ticket = await start_limited("problem", ctx.author.id, get_ctx_guild_id(ctx), 0, ctx.send)
+    if ticket is None:
+        return
+
     await ctx.send(f"🔍 Fetching problem #{question_no}...")
     
-    details = fetch_problem_by_number(question_no)
+    try:
+        details = await asyncio.to_thread(fetch_problem_by_number, question_no)
+    finally:
+        finish_command(ticket)
     
     if not details:
         await ctx.send(f"❌ Could not find problem #{question_no}. Please check the question number.")
@@ -962,79 +2284,280 @@ async def problem(ctx, question_no: int):
     diff_emoji = {"Easy": "🟢", "Medium": "🟡", "Hard": "🔴"}.get(difficulty, "⚪")
     tag_str = ", ".join([t["name"] for t in tags[:5]]) if tags else "None"
     
-    # Convert HTML to plain text
-    description = strip_html(content)
-    
-    # Truncate if too long for Discord (2000 char limit)
-    if len(description) > 1500:
-        description = description[:1500] + "\n\n... _(truncated)_"
+    # Convert HTML to Discord markdown, truncated at a clean boundary (cached per slug)
+    description = render_problem_description(title_slug, content)
     
     link = f"https://leetcode.com/problems/{title_slug}/"
     
-    msg = f"{diff_emoji} **#{q_no}. {title}** ({difficulty})\n"
-    msg += f"📊 Acceptance: {ac_rate:.1f}% | 👍 {likes} | 👎 {dislikes}\n"
-    msg += f"🏷️ Tags: {tag_str}\n"
-    msg += f"🔗 {link}\n\n"
-    msg += f"**Description:**\n{description}"
-    
-    # Split message if too long
-    if len(msg) > 2000:
-        await ctx.send(msg[:2000])
-        if len(msg) > 2000:
-            await ctx.send(msg[2000:4000])
-    else:
-        await ctx.send(msg)
+    lines = [
+        f"{diff_emoji} **#{q_no}. {title}** ({difficulty})",
+        f"📊 Acceptance: {ac_rate:.1f}% | 👍 {likes} | 👎 {dislikes}",
+        f"🏷️ Tags: {tag_str}",
+        f"🔗 {link}",
+        "",
+        "**Description:**",
+    ]
+    lines += description.split("\n")
+    
+    set_cached("problem", (question_no,), lines)
+    await send_paginated(ctx.send, lines)
 
 
 @bot.command()
 async def daily(ctx):
     """Display today's LeetCode daily challenge"""
-    await ctx.send("🌅 Fetching today's daily challenge...")
+    parts = get_daily_challenge_parts()
     
-    details = fetch_daily_challenge()
+    if parts is None:
+        # Cache miss (e.g. prefetch failed) - refresh now
+        await ctx.send("🌅 Fetching today's daily challenge...")
+        parts = await asyncio.to_thread(refresh_daily_challenge)
     
-    if not details:
+    if not parts:
         await ctx.send("❌ Could not fetch today's daily challenge. Please try again later.")
         return
     
-    q_no = details.get("questionFrontendId", "?")
-    title = details.get("title", "Unknown")
-    difficulty = details.get("difficulty", "Unknown")
-    title_slug = details.get("titleSlug", "")
-    content = details.get("content", "No description available.")
-    tags = details.get("topicTags", [])
-    ac_rate = details.get("acRate", 0)
-    likes = details.get("likes", 0)
-    dislikes = details.get("dislikes", 0)
-    date = details.get("date", "")
-    
-    diff_emoji = {"Easy": "🟢", "Medium": "🟡", "Hard": "🔴"}.get(difficulty, "⚪")
-    tag_str = ", ".join([t["name"] for t in tags[:5]]) if tags else "None"
+    for part in parts:
+        await safe_send(ctx.send, part)
+
+
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def autodaily(ctx, mode: str = None):
+    """Toggle auto-posting the daily challenge after LeetCode's rollover (Admin only)"""
+    guild_id = get_ctx_guild_id(ctx)
+    if mode is None:
+        state = "on" if get_guild_setting(guild_id, "daily_autopost", False) else "off"
+        await ctx.send(f"📅 Daily challenge auto-post is **{state}**")
+        return
     
-    # Convert HTML to plain text
-    description = strip_html(content)
+    mode = mode.lower()
+    if mode not in ("on", "off"):
+        await ctx.send("❌ Usage: `!autodaily on` or `!autodaily off`")
+        return
     
-    # Truncate if too long for Discord (2000 char limit)
-    if len(description) > 1500:
-        description = description[:1500] + "\n\n... _(truncated)_"
+    set_guild_setting(guild_id, "daily_autopost", mode == "on")
+    await ctx.send(f"✅ Daily challenge auto-post turned **{mode}**")
+
+@autodaily.error
+async def autodaily_error(ctx, error):
+    if isinstance(error, commands.MissingPermissions):
+        await ctx.send("❌ You need administrator permissions to use this command.")
+
+
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def reportmode(ctx, mode: str = None):
+    """Choose full per-user or summary-only end-of-day reports (Admin only)"""
+    guild_id = get_ctx_guild_id(ctx)
+    if mode is None:
+        await ctx.send(f"📊 End-of-day report mode: **{get_guild_setting(guild_id, 'report_mode', 'full')}**")
+        return
     
-    link = f"https://leetcode.com/problems/{title_slug}/"
+    mode = mode.lower()
+    if mode not in ("full", "summary"):
+        await ctx.send("❌ Usage: `!reportmode full` or `!reportmode summary`")
+        return
     
-    msg = f"📅 **Daily Challenge** ({date})\n\n"
-    msg += f"{diff_emoji} **#{q_no}. {title}** ({difficulty})\n"
-    msg += f"📊 Acceptance: {ac_rate:.1f}% | 👍 {likes} | 👎 {dislikes}\n"
-    msg += f"🏷️ Tags: {tag_str}\n"
-    msg += f"🔗 {link}\n\n"
-    msg += f"**Description:**\n{description}"
-    
-    # Split message if too long
-    if len(msg) > 2000:
-        await ctx.send(msg[:2000])
-        if len(msg) > 2000:
-            await ctx.send(msg[2000:4000])
-    else:
-        await ctx.send(msg)
+    set_guild_setting(guild_id, "report_mode", mode)
+    await ctx.send(f"✅ End-of-day report mode set to **{mode}**")
+
+@reportmode.error
+async def reportmode_error(ctx, error):
+    if isinstance(error, commands.MissingPermissions):
+        await ctx.send("❌ You need administrator permissions to use this command.")
+
+
+def progressive_editor(interaction):
+    """Return an async show(lines_or_text, final=False) that edits a deferred response.
+
+    Partial updates are throttled to SLASH_EDIT_INTERVAL; the final call always
+    goes out, with pages past the first sent as followups.
+    """
+    loop = asyncio.get_running_loop()
+    state = {"last_edit": 0.0, "done": False}
+
+    async def show(content, final=False):
+        if state["done"]:
+            return
+        now = loop.time()
+        if not final and now - state["last_edit"] < SLASH_EDIT_INTERVAL:
+            return
+        state["last_edit"] = now
+
+        lines = content if isinstance(content, list) else [content]
+        pages = paginate_lines(lines) or ["(empty)"]
+        if not final:
+            # Partial output only ever occupies the original response
+            pages = pages[:1]
+        else:
+            state["done"] = True
+
+        await safe_send(interaction.edit_original_response, content=pages[0])
+        for page in pages[1:]:
+            await safe_send(interaction.followup.send, page)
+
+    return show
+
+
+async def run_slash(interaction, command, handler, user_count=1, scope=None, cached=False):
+    """Defer a slash command and run handler(show), rejecting duplicate invocations.
+
+    Discord needs an acknowledgement within 3 seconds, so the response is deferred
+    before any LeetCode request; handler fills it in via progressive edits.
+    Nothing is charged when the handler will answer from the command cache
+    (cached=True) or join a computation already in flight for scope.
+    """
+    # Every worker receives the interaction; only the leader (which registered
+    # the commands, see sync_slash_commands) answers it
+    if not is_leader():
+        return
+
+    # Slash commands must be acknowledged within 3 seconds, so don't wait for startup
+    if not is_loaded():
+        await interaction.response.send_message("⏳ Still starting up, try again in a moment.", ephemeral=True)
+        return
+
+    key = (interaction.user.id, command)
+    if key in _slash_state["in_flight"]:
+        await interaction.response.send_message(
+            f"⏳ Your `/{command}` is still loading, hang on.", ephemeral=True
+        )
+        return
+
+    async def reply_limited(msg):
+        await interaction.response.send_message(msg, ephemeral=True)
+
+    ticket = None
+    if not cached:
+        ticket = await start_limited(command, interaction.user.id, interaction.guild_id, user_count, reply_limited, scope)
+        if ticket is None:
+            return
+
+    _slash_state["in_flight"].add(key)
+    try:
+        await interaction.response.defer(thinking=True)
+        show = progressive_editor(interaction)
+        with span("slash", command=command, guild_id=interaction.guild_id) as current:
+            try:
+                await handler(show)
+            except Exception as e:
+                print(f"Slash command /{command} failed: {e}")
+                current.error = f"{type(e).__name__}: {e}"
+                await show(f"❌ Failed to load `/{command}`, please try again.", final=True)
+    finally:
+        _slash_state["in_flight"].discard(key)
+        finish_command(ticket)
+
+
+@bot.tree.command(name="leaderboard", description="Show today's leaderboard")
+async def slash_leaderboard(interaction: discord.Interaction):
+    async def handler(show):
+        guild_id = interaction.guild_id
+        registry = get_scope_registry(guild_id)
+        if not registry:
+            await show("No registered users.", final=True)
+            return
+        lines = await build_leaderboard_lines(guild_id, registry, on_partial=show)
+        await show(lines, final=True)
+
+    guild_id = interaction.guild_id
+    await run_slash(interaction, "leaderboard", handler, len(get_scope_registry(guild_id)), scope=guild_id)
+
+
+@bot.tree.command(name="progress", description="Show today's progress for all registered users")
+async def slash_progress(interaction: discord.Interaction):
+    guild_id = interaction.guild_id
+    cached = get_cached("progress", guild_id)
+
+    async def handler(show):
+        registry = get_scope_registry(guild_id)
+        if not registry:
+            await show("❌ No registered users yet.", final=True)
+            return
+        lines = cached
+        if lines is None:
+            lines = await build_progress_lines(guild_id, registry, on_partial=show)
+        await show(lines, final=True)
+
+    await run_slash(
+        interaction, "progress", handler, len(get_scope_registry(guild_id)), scope=guild_id, cached=cached is not None
+    )
+
+
+@bot.tree.command(name="profile", description="Show a user's LeetCode profile and streak")
+async def slash_profile(interaction: discord.Interaction, member: discord.Member = None):
+    target = member or interaction.user
+    user_id = str(target.id)
+    cached = get_cached("profile", user_id) if user_id in user_registry else None
+
+    async def handler(show):
+        if user_id not in user_registry:
+            await show(f"❌ {target.display_name} is not registered.", final=True)
+            return
+
+        msg = cached
+        if msg is None:
+            msg = await build_profile_message(target.display_name, user_id, on_partial=show)
+        await show(msg, final=True)
 
+    await run_slash(interaction, "profile", handler, cached=cached is not None)
 
-webserver.keep_alive()
-bot.run(token, log_handler=handler, log_level=logging.DEBUG)
\ No newline at end of file
+
+@webserver.routes.get("/api/status")
+async def api_status(request):
+    """Read-only bot status, read straight from in-memory state on the bot loop"""
+    return web.json_response({
+        "loaded": is_loaded(),
+        "gateway_ready": bot.is_ready(),
+        "guilds": len(bot.guilds),
+        "registered_users": len(user_registry),
+        "guilds_with_members": len(guild_members),
+        "leader": is_leader(),
+        "worker_id": WORKER_ID,
+        "scheduler_running": scheduler.running,
+        "startup_phases": get_phase_timings(),
+    })
+
+
+@webserver.routes.get("/api/guilds/{guild_id}/leaderboard/today")
+async def api_today(request):
+    return respond_api_view(request, "today", request.match_info["guild_id"])
+
+
+@webserver.routes.get("/api/guilds/{guild_id}/leaderboard/weekly")
+async def api_weekly(request):
+    return respond_api_view(request, "weekly", request.match_info["guild_id"])
+
+
+@webserver.routes.get("/api/guilds/{guild_id}/streaks")
+async def api_streaks(request):
+    return respond_api_view(request, "streaks", request.match_info["guild_id"])
+
+
+@webserver.routes.get("/api/users/{discord_id}")
+async def api_user(request):
+    return respond_api_view(request, "user", request.match_info["discord_id"])
+
+
+async def run_bot():
+    # Serve keep-alive pings right away, then load state while logging in
+    # so storage and the gateway connect in parallel
+    server = await webserver.start()
+    loader = asyncio.create_task(load_state())
+    try:
+        async with bot:
+            await bot.start(token)
+    finally:
+        loader.cancel()
+        # Hand leadership over now instead of when the lock's TTL runs out
+        await asyncio.to_thread(step_down)
+        await webserver.stop(server)
+
+
+if __name__ == "__main__":
+    discord.utils.setup_logging(handler=handler, level=logging.DEBUG)
+    try:
+        asyncio.run(run_bot())
+    except KeyboardInterrupt:
+        pass
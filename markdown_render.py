@@ -0,0 +1,240 @@
+"""
+HTML to Discord markdown renderer for LeetCode problem descriptions
+"""
+from html.parser import HTMLParser
+
+DESCRIPTION_LIMIT = 1500
+TRUNCATED_SUFFIX = "\n\n... _(truncated)_"
+MAX_CACHED_DESCRIPTIONS = 512
+
+# Characters that Discord would read as formatting in plain text
+_MARKDOWN_ESCAPES = str.maketrans({
+    "*": "\\*",
+    "_": "\\_",
+    "~": "\\~",
+    "`": "\\`",
+    "|": "\\|",
+})
+
+# (title_slug, limit) -> rendered markdown
+_description_cache = {}
+
+
+class DiscordMarkdownParser(HTMLParser):
+    """Convert HTML to Discord markdown in a single pass over the document"""
+
+    BLOCK_TAGS = {"p", "div", "section", "blockquote", "table", "tr",
+                  "h1", "h2", "h3", "h4", "h5", "h6"}
+    SKIP_TAGS = {"script", "style"}
+
+    def __init__(self):
+        # convert_charrefs decodes every named/numeric entity for us
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.trailing_newlines = 0
+        self.list_stack = []
+        self.pre_depth = 0
+        self.pre_start = False
+        self.code_depth = 0
+        self.skip_depth = 0
+
+    # ---------- output helpers ----------
+
+    def _write(self, text):
+        if not text:
+            return
+        self.parts.append(text)
+        stripped = text.rstrip("\n")
+        if stripped:
+            self.trailing_newlines = len(text) - len(stripped)
+        else:
+            self.trailing_newlines += len(text)
+
+    def _ensure_newlines(self, count):
+        """Make sure output ends with at least `count` newlines (no-op at start)"""
+        if not self.parts:
+            return
+        if self.trailing_newlines < count:
+            self._write("\n" * (count - self.trailing_newlines))
+
+    def _at_line_start(self):
+        return not self.parts or self.trailing_newlines > 0
+
+    def _close_inline(self, marker):
+        """Close an inline marker, moving trailing spaces outside it for Discord"""
+        if self.parts and self.parts[-1].endswith(" "):
+            self.parts[-1] = self.parts[-1].rstrip(" ")
+            self._write(marker + " ")
+        else:
+            self._write(marker)
+
+    # ---------- parser callbacks ----------
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+            return
+        if self.skip_depth:
+            return
+
+        if tag == "pre":
+            self._ensure_newlines(2)
+            self._write("```\n")
+            self.pre_depth += 1
+            self.pre_start = True
+        elif self.pre_depth:
+            # Formatting inside code blocks is shown literally by Discord
+            return
+        elif tag == "br":
+            self._write("\n")
+        elif tag in self.BLOCK_TAGS:
+            self._ensure_newlines(2 if tag != "div" else 1)
+            if tag.startswith("h"):
+                self._write("**")
+        elif tag in ("ul", "ol"):
+            self._ensure_newlines(1)
+            self.list_stack.append({"ordered": tag == "ol", "index": 0})
+        elif tag == "li":
+            self._ensure_newlines(1)
+            depth = max(len(self.list_stack), 1)
+            indent = "  " * (depth - 1)
+            if self.list_stack and self.list_stack[-1]["ordered"]:
+                self.list_stack[-1]["index"] += 1
+                self._write(f"{indent}{self.list_stack[-1]['index']}. ")
+            else:
+                self._write(f"{indent}• ")
+        elif tag in ("strong", "b"):
+            self._write("**")
+        elif tag in ("em", "i"):
+            self._write("*")
+        elif tag == "code":
+            self.code_depth += 1
+            if self.code_depth == 1:
+                self._write("`")
+        elif tag == "sup":
+            self._write("^")
+        elif tag == "img":
+            alt = dict(attrs).get("alt")
+            if alt:
+                self._write(f"[{alt}]")
+        elif tag in ("td", "th"):
+            self._write(" | ")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in ("br", "img"):
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+        if self.skip_depth:
+            return
+
+        if tag == "pre":
+            if self.pre_depth:
+                self.pre_depth -= 1
+                self._ensure_newlines(1)
+                self._write("```")
+                self._ensure_newlines(2)
+        elif self.pre_depth:
+            return
+        elif tag in self.BLOCK_TAGS:
+            if tag.startswith("h"):
+                self._close_inline("**")
+            self._ensure_newlines(2 if tag != "div" else 1)
+        elif tag in ("ul", "ol"):
+            if self.list_stack:
+                self.list_stack.pop()
+            self._ensure_newlines(1 if self.list_stack else 2)
+        elif tag in ("strong", "b"):
+            self._close_inline("**")
+        elif tag in ("em", "i"):
+            self._close_inline("*")
+        elif tag == "code":
+            if self.code_depth:
+                self.code_depth -= 1
+                if self.code_depth == 0:
+                    self._close_inline("`")
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+
+        if self.pre_depth:
+            if self.pre_start:
+                # A newline right after <pre> is not part of the content
+                self.pre_start = False
+                if data.startswith("\n"):
+                    data = data[1:]
+            self._write(data.replace("\xa0", " "))
+            return
+
+        # Collapse whitespace like a browser would
+        text = " ".join(data.replace("\xa0", " ").split())
+        if not text:
+            if not self._at_line_start() and data:
+                self._write(" ")
+            return
+        if data[:1].isspace() and not self._at_line_start():
+            text = " " + text
+        if data[-1:].isspace():
+            text += " "
+
+        if not self.code_depth:
+            text = text.translate(_MARKDOWN_ESCAPES)
+        self._write(text)
+
+    def get_markdown(self):
+        # Trim trailing spaces left before newlines by inline whitespace
+        text = "".join(self.parts)
+        return "\n".join(line.rstrip() for line in text.split("\n")).strip()
+
+
+def html_to_markdown(html_content):
+    """Convert problem HTML into Discord markdown"""
+    if not html_content:
+        return ""
+
+    parser = DiscordMarkdownParser()
+    parser.feed(html_content)
+    parser.close()
+    return parser.get_markdown()
+
+
+def truncate_markdown(text, limit=DESCRIPTION_LIMIT):
+    """Truncate markdown at a paragraph/line boundary, keeping code fences closed"""
+    if len(text) <= limit:
+        return text
+
+    # Leave room to close a code fence
+    window = text[:limit - 4]
+    cut = window.rfind("\n\n")
+    if cut < limit // 2:
+        cut = window.rfind("\n")
+    if cut < limit // 2:
+        cut = window.rfind(" ")
+    if cut <= 0:
+        cut = len(window)
+
+    truncated = text[:cut].rstrip()
+    if truncated.count("```") % 2 == 1:
+        truncated += "\n```"
+    return truncated + TRUNCATED_SUFFIX
+
+
+def render_problem_description(title_slug, html_content, limit=DESCRIPTION_LIMIT):
+    """Render a problem's description once per slug and serve repeats from cache"""
+    key = (title_slug, limit)
+    if title_slug and key in _description_cache:
+        return _description_cache[key]
+
+    rendered = truncate_markdown(html_to_markdown(html_content), limit)
+
+    if title_slug:
+        if len(_description_cache) >= MAX_CACHED_DESCRIPTIONS:
+            # Evict the oldest entry (dicts keep insertion order)
+            del _description_cache[next(iter(_description_cache))]
+        _description_cache[key] = rendered
+    return rendered
@@ -0,0 +1,214 @@
+"""
+Metrics module - in-process counters, gauges and histograms in Prometheus text format
+
+Metrics are updated from the bot loop and worker threads and rendered by the
+webserver's /metrics route, so every update takes the module lock.
+"""
+import time
+import math
+import threading
+import functools
+from tracing import span
+from health import job_started, job_finished
+
+_lock = threading.Lock()
+_metrics = []
+# Gauges read at scrape time: (name, help, fn returning a number or {labels: value})
+_collectors = []
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+JOB_BUCKETS = (0.5, 1, 5, 15, 30, 60, 120, 300, 600)
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        with _lock:
+            _metrics.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = self._header()
+        for key, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with _lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    render = Counter.render
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            state = self._values.get(key)
+            if state is None:
+                state = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self._values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def render(self):
+        lines = self._header()
+        for key, state in self._values.items():
+            for bound, count in zip(self.buckets, state["counts"]):
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+def register_gauge_callback(name, help_text, fn, labelname=None):
+    """Expose a gauge computed at scrape time.
+
+    fn returns a number, or a {label_value: number} dict when labelname is given.
+    """
+    _collectors.append((name, help_text, fn, labelname))
+
+
+def render_metrics():
+    """Render every metric in the Prometheus text exposition format"""
+    lines = []
+    with _lock:
+        for metric in _metrics:
+            lines.extend(metric.render())
+
+    for name, help_text, fn, labelname in _collectors:
+        try:
+            value = fn()
+        except Exception as e:
+            print(f"Failed to collect metric {name}: {e}")
+            continue
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        if labelname is None:
+            lines.append(f"{name} {_format_value(value)}")
+        else:
+            for label_value, sample in value.items():
+                lines.append(f"{name}{_format_labels((labelname,), (label_value,))} {_format_value(sample)}")
+    return "\n".join(lines) + "\n"
+
+
+# ---------- shared metrics ----------
+
+LEETCODE_LATENCY = Histogram(
+    "leetcode_request_duration_seconds", "LeetCode GraphQL request latency", ["query"]
+)
+LEETCODE_ERRORS = Counter(
+    "leetcode_request_errors_total", "Failed LeetCode GraphQL requests", ["query", "reason"]
+)
+LEETCODE_RATE_LIMITED = Counter(
+    "leetcode_rate_limited_total", "LeetCode GraphQL requests answered with HTTP 429", ["query"]
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups by cache and result (hit, stale, miss)", ["cache", "result"]
+)
+JOB_DURATION = Histogram(
+    "job_duration_seconds", "Scheduled job run time", ["job"], buckets=JOB_BUCKETS
+)
+JOB_LAST_SUCCESS = Gauge(
+    "job_last_success_timestamp_seconds", "Unix time of each job's last successful run", ["job"]
+)
+JOB_FAILURES = Counter(
+    "job_failures_total", "Scheduled job runs that raised", ["job"]
+)
+DISCORD_SEND_WAITING = Gauge(
+    "discord_send_waiting", "safe_send calls queued on a rate-limit bucket or in flight"
+)
+DISCORD_SEND_RETRIES = Counter(
+    "discord_send_retries_total", "Discord send retries by reason", ["reason"]
+)
+OUTBOX_RETRIES = Counter(
+    "outbox_retries_total", "Outbox items rescheduled or parked after a failed send", ["outcome"]
+)
+
+
+def instrument_job(job):
+    """Wrap a scheduled async job to record its duration, failures and last success.
+
+    Each run is also the root span of a trace, so its LeetCode, storage and send
+    calls show up under it. Start, end and success times feed the health checks.
+    """
+    name = job.__name__
+
+    @functools.wraps(job)
+    async def wrapper(*args, **kwargs):
+        started = time.monotonic()
+        job_started(name)
+        try:
+            with span(f"job:{name}"):
+                result = await job(*args, **kwargs)
+        except Exception as e:
+            JOB_FAILURES.inc(job=name)
+            job_finished(name, e)
+            raise
+        finally:
+            JOB_DURATION.observe(time.monotonic() - started, job=name)
+        JOB_LAST_SUCCESS.set(time.time(), job=name)
+        job_finished(name)
+        return result
+
+    return wrapper
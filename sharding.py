@@ -0,0 +1,124 @@
+"""
+Sharding module - splits submission polling across several bot workers
+
+Each worker heartbeats into the storage layer. Users are assigned to live
+workers by consistent hashing on discord_id, so when a worker dies only its
+users move. One worker holds the leader lock and runs the daily/weekly jobs.
+"""
+import os
+import socket
+import hashlib
+import bisect
+import functools
+from storage import (
+    heartbeat_worker,
+    load_live_workers,
+    try_acquire_leader_lock,
+    release_leader_lock
+)
+
+SHARDING_ENABLED = os.getenv("SHARDING_ENABLED", "").lower() in ("1", "true", "yes")
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+HEARTBEAT_INTERVAL = 30  # seconds between heartbeats
+WORKER_TTL = 90          # a worker missing heartbeats this long is considered dead
+LEADER_LOCK_TTL = 90     # leader lock expires if not renewed
+VIRTUAL_NODES = 64       # ring points per worker, evens out shard sizes
+
+_state = {
+    "workers": [WORKER_ID],
+    "ring": [],
+    "is_leader": not SHARDING_ENABLED,
+}
+
+
+def _hash(key):
+    return int(hashlib.md5(str(key).encode("utf-8")).hexdigest()[:16], 16)
+
+
+def build_ring(worker_ids):
+    """Build a sorted consistent-hash ring of (point, worker_id)"""
+    ring = []
+    for worker_id in worker_ids:
+        for i in range(VIRTUAL_NODES):
+            ring.append((_hash(f"{worker_id}#{i}"), worker_id))
+    ring.sort()
+    return ring
+
+
+def owner_of(discord_id, ring=None):
+    """Return the worker that owns a user on the ring"""
+    ring = ring if ring is not None else _state["ring"]
+    if not ring:
+        return WORKER_ID
+
+    point = _hash(discord_id)
+    index = bisect.bisect(ring, (point, ""))
+    if index == len(ring):
+        index = 0
+    return ring[index][1]
+
+
+def owns_user(discord_id):
+    """Check whether this worker should poll the given user"""
+    if not SHARDING_ENABLED:
+        return True
+    return owner_of(str(discord_id)) == WORKER_ID
+
+
+def filter_owned(user_registry):
+    """Return the part of the registry this worker polls"""
+    if not SHARDING_ENABLED:
+        return user_registry
+    return {k: v for k, v in user_registry.items() if owns_user(k)}
+
+
+def is_leader():
+    """Check whether this worker runs the daily/weekly jobs and commands"""
+    return _state["is_leader"]
+
+
+def refresh_membership():
+    """Heartbeat, rebuild the ring from live workers and renew the leader lock"""
+    if not SHARDING_ENABLED:
+        return
+
+    try:
+        heartbeat_worker(WORKER_ID)
+        workers = load_live_workers(WORKER_ID, WORKER_TTL)
+        if WORKER_ID not in workers:
+            workers = sorted(workers + [WORKER_ID])
+
+        if workers != _state["workers"] or not _state["ring"]:
+            print(f"Shard membership changed: {_state['workers']} -> {workers}, rebalancing")
+            _state["workers"] = workers
+            _state["ring"] = build_ring(workers)
+
+        was_leader = _state["is_leader"]
+        _state["is_leader"] = try_acquire_leader_lock(WORKER_ID, LEADER_LOCK_TTL)
+        if _state["is_leader"] != was_leader:
+            print(f"Worker {WORKER_ID} is {'now' if _state['is_leader'] else 'no longer'} the leader")
+    except Exception as e:
+        # Keep the last known membership; a dead lock simply expires
+        print(f"Failed to refresh shard membership: {e}")
+
+
+def step_down():
+    """Release leadership on shutdown so another worker can take over quickly"""
+    if SHARDING_ENABLED and _state["is_leader"]:
+        _state["is_leader"] = False
+        try:
+            release_leader_lock(WORKER_ID)
+        except Exception as e:
+            # The lock still expires on its own
+            print(f"Failed to release the leader lock: {e}")
+
+
+def leader_only(job):
+    """Wrap a scheduled job so it only runs on the leader worker"""
+    @functools.wraps(job)
+    async def wrapper(*args, **kwargs):
+        if not is_leader():
+            return
+        return await job(*args, **kwargs)
+    return wrapper
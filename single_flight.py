@@ -0,0 +1,69 @@
+"""
+Single-flight coalescing - concurrent identical commands share one computation
+"""
+import time
+import asyncio
+
+# Width of the time bucket in a flight key; a call in a new bucket starts a fresh flight
+FLIGHT_BUCKET_SECONDS = 30
+
+# (command, scope, bucket) -> {"task": Task, "listeners": [...], "latest": partial or None}
+_flights = {}
+
+
+def _make_key(command, scope):
+    return (command, str(scope), int(time.time() // FLIGHT_BUCKET_SECONDS))
+
+
+def _start_flight(key, compute):
+    flight = {"task": None, "listeners": [], "latest": None}
+
+    async def broadcast(partial):
+        flight["latest"] = partial
+        for listener in list(flight["listeners"]):
+            try:
+                await listener(partial)
+            except Exception as e:
+                # One caller's failed edit must not fail the shared computation
+                print(f"Single-flight listener for {key[0]} failed: {e}")
+
+    def finish(_task):
+        if _flights.get(key) is flight:
+            del _flights[key]
+
+    flight["task"] = asyncio.create_task(compute(broadcast))
+    flight["task"].add_done_callback(finish)
+    _flights[key] = flight
+    return flight
+
+
+def is_in_flight(command, scope):
+    """Whether a call to coalesce(command, scope, ...) right now would join a running computation"""
+    return _make_key(command, scope) in _flights
+
+
+async def coalesce(command, scope, compute, on_partial=None):
+    """Run compute(on_partial) once for all concurrent callers with the same key.
+
+    Args:
+        command: command name, e.g. "leaderboard"
+        scope: what the result depends on, e.g. the guild ID
+        compute: async callable taking a partial-result callback and returning the result
+        on_partial: optional async callback for this caller's partial results
+    """
+    key = _make_key(command, scope)
+    flight = _flights.get(key)
+    if flight is None:
+        flight = _start_flight(key, compute)
+    elif on_partial is not None and flight["latest"] is not None:
+        # Catch a late joiner up with the progress made so far
+        await on_partial(flight["latest"])
+
+    if on_partial is not None:
+        flight["listeners"].append(on_partial)
+    try:
+        # Shield so one caller being cancelled doesn't cancel everyone's result
+        return await asyncio.shield(flight["task"])
+    finally:
+        if on_partial is not None and on_partial in flight["listeners"]:
+            flight["listeners"].remove(on_partial)
@@ -0,0 +1,58 @@
+"""
+Startup module - phase timings and the readiness gate
+
+The bot connects to the gateway straight away while registries load in the
+background. Each startup phase is timed (and traced as a span); commands and
+jobs wait on wait_until_loaded() instead of reading half-loaded state.
+"""
+import time
+import asyncio
+from contextlib import contextmanager
+from tracing import span
+
+_started = time.monotonic()
+# phase name -> seconds, in the order phases finished
+_phases = {}
+_loaded = asyncio.Event()
+
+
+@contextmanager
+def startup_phase(name):
+    """Time one startup phase"""
+    started = time.monotonic()
+    with span(f"startup:{name}"):
+        yield
+    _phases[name] = time.monotonic() - started
+
+
+def record_since_start(name):
+    """Record a milestone as seconds since the process started (first call wins)"""
+    _phases.setdefault(name, time.monotonic() - _started)
+
+
+def get_phase_timings():
+    return dict(_phases)
+
+
+def format_phase_timings():
+    return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in _phases.items())
+
+
+def mark_loaded():
+    record_since_start("loaded")
+    _loaded.set()
+
+
+def is_loaded():
+    return _loaded.is_set()
+
+
+async def wait_until_loaded(timeout=None):
+    """Wait for registries to load; returns False if the timeout passes first"""
+    if _loaded.is_set():
+        return True
+    try:
+        await asyncio.wait_for(_loaded.wait(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
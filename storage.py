@@ -3,8 +3,12 @@ Storage module - Uses MongoDB if available, falls back to JSON files
 """
 import json
 import os
+import time
+import uuid
+import threading
 from datetime import datetime, timedelta
 import pytz
+from tracing import traced
 
 # Try to import database module
 try:
@@ -12,8 +16,16 @@ try:
         get_users_collection,
         get_streaks_collection,
         get_config_collection,
-        get_weekly_collection
+        get_weekly_collection,
+        get_workers_collection,
+        get_locks_collection,
+        get_outbox_collection,
+        get_guild_members_collection,
+        get_db,
+        ping_db
     )
+    from pymongo import ReturnDocument
+    from pymongo.errors import DuplicateKeyError
     MONGO_AVAILABLE = True
 except ImportError:
     MONGO_AVAILABLE = False
@@ -22,6 +34,28 @@ FILE_PATH = "users.json"
 STREAK_PATH = "streak.json"
 CONFIG_PATH = "config.json"
 WEEKLY_PATH = "weekly.json"
+DM_CHANNELS_PATH = "dm_channels.json"
+OUTBOX_PATH = "outbox.json"
+GUILD_MEMBERS_PATH = "guild_members.json"
+
+# Outbox calls run in worker threads; serialize the JSON file's read-modify-write
+_outbox_file_lock = threading.Lock()
+# update_weekly_solve runs in worker threads; serialize its read-modify-write
+_weekly_lock = threading.Lock()
+
+def connect_storage():
+    """Open the MongoDB connection up front; returns the backend in use"""
+    if MONGO_AVAILABLE and get_db() is not None:
+        return "mongodb"
+    return "json"
+
+def check_storage():
+    """Return (backend, reachable) for the health endpoints"""
+    if MONGO_AVAILABLE:
+        reachable = ping_db()
+        if reachable is not None:
+            return "mongodb", reachable
+    return "json", os.access(".", os.W_OK)
 
 # ============== USERS ==============
 
@@ -47,6 +81,7 @@ def load_users():
     except (json.JSONDecodeError, Exception):
         return {}
 
+@traced("storage.save_users")
 def save_users(data):
     """Save users to MongoDB and JSON"""
     if MONGO_AVAILABLE:
@@ -62,6 +97,48 @@ def save_users(data):
     with open(FILE_PATH, "w") as f:
         json.dump(data, f, indent=4)
 
+# ============== GUILD MEMBERS ==============
+
+def load_guild_members():
+    """Load guild_id -> registered discord IDs from MongoDB or JSON"""
+    if MONGO_AVAILABLE:
+        collection = get_guild_members_collection()
+        if collection is not None:
+            guilds = {}
+            for doc in collection.find():
+                guilds[doc["guild_id"]] = doc.get("members", [])
+            return guilds
+    
+    # Fallback to JSON
+    if not os.path.exists(GUILD_MEMBERS_PATH):
+        return {}
+    try:
+        with open(GUILD_MEMBERS_PATH, "r") as f:
+            content = f.read().strip()
+            if not content:
+                return {}
+            return json.loads(content)
+    except (json.JSONDecodeError, Exception):
+        return {}
+
+@traced("storage.save_guild_members")
+def save_guild_members(data):
+    """Save guild memberships to MongoDB and JSON"""
+    if MONGO_AVAILABLE:
+        collection = get_guild_members_collection()
+        if collection is not None:
+            collection.delete_many({"guild_id": {"$nin": list(data.keys())}})
+            for guild_id, members in data.items():
+                collection.replace_one(
+                    {"guild_id": guild_id},
+                    {"guild_id": guild_id, "members": members},
+                    upsert=True
+                )
+    
+    # Always save to JSON as backup
+    with open(GUILD_MEMBERS_PATH, "w") as f:
+        json.dump(data, f, indent=4)
+
 # ============== STREAKS ==============
 
 def load_streak():
@@ -88,6 +165,7 @@ def load_streak():
     except (json.JSONDecodeError, Exception):
         return {}
 
+@traced("storage.save_streak")
 def save_streak(data):
     """Save streaks to MongoDB and JSON"""
     if MONGO_AVAILABLE:
@@ -130,6 +208,7 @@ def load_config():
     except (json.JSONDecodeError, Exception):
         return {}
 
+@traced("storage.save_config")
 def save_config(data):
     """Save config to MongoDB and JSON"""
     if MONGO_AVAILABLE:
@@ -145,8 +224,50 @@ def save_config(data):
     with open(CONFIG_PATH, "w") as f:
         json.dump(data, f, indent=4)
 
+# ============== DM CHANNELS ==============
+
+@traced("storage.load_dm_channels")
+def load_dm_channels():
+    """Load discord_id -> DM channel ID map from MongoDB or JSON"""
+    if MONGO_AVAILABLE:
+        collection = get_config_collection()
+        if collection is not None:
+            doc = collection.find_one({"_id": "dm_channels"})
+            if doc:
+                return doc.get("channels", {})
+            return {}
+    
+    # Fallback to JSON
+    if not os.path.exists(DM_CHANNELS_PATH):
+        return {}
+    try:
+        with open(DM_CHANNELS_PATH, "r") as f:
+            content = f.read().strip()
+            if not content:
+                return {}
+            return json.loads(content)
+    except (json.JSONDecodeError, Exception):
+        return {}
+
+@traced("storage.save_dm_channels")
+def save_dm_channels(data):
+    """Save discord_id -> DM channel ID map to MongoDB and JSON"""
+    if MONGO_AVAILABLE:
+        collection = get_config_collection()
+        if collection is not None:
+            collection.replace_one(
+                {"_id": "dm_channels"},
+                {"_id": "dm_channels", "channels": data},
+                upsert=True
+            )
+    
+    # Always save to JSON as backup
+    with open(DM_CHANNELS_PATH, "w") as f:
+        json.dump(data, f, indent=4)
+
 # ============== WEEKLY ==============
 
+@traced("storage.load_weekly")
 def load_weekly():
     """Load weekly leaderboard from MongoDB or JSON"""
     default = {"week_start": None, "data": {}}
@@ -172,6 +293,7 @@ def load_weekly():
     except (json.JSONDecodeError, Exception):
         return default
 
+@traced("storage.save_weekly")
 def save_weekly(data):
     """Save weekly leaderboard to MongoDB and JSON"""
     if MONGO_AVAILABLE:
@@ -202,50 +324,286 @@ def reset_weekly():
     save_weekly(data)
     return data
 
+@traced("storage.update_weekly_solve")
 def update_weekly_solve(discord_id, problem_title, title_slug, difficulty, question_no, is_new_problem=True):
     """Add a problem to user's weekly solve count
     
     Args:
         is_new_problem: If False, this is a re-solve of an old problem - counts as submission but not unique problem
     """
-    weekly = load_weekly()
-    discord_id = str(discord_id)
+    with _weekly_lock:
+        weekly = load_weekly()
+        discord_id = str(discord_id)
+    
+        if discord_id not in weekly["data"]:
+            weekly["data"][discord_id] = {
+                "unique_problems": 0,
+                "submissions": 0,
+                "problems": [],
+                "easy": 0,
+                "medium": 0,
+                "hard": 0
+            }
     
-    if discord_id not in weekly["data"]:
-        weekly["data"][discord_id] = {
-            "unique_problems": 0,
-            "submissions": 0,
-            "problems": [],
-            "easy": 0,
-            "medium": 0,
-            "hard": 0
-        }
-    
-    # Always increment submissions count (even for re-solves)
-    weekly["data"][discord_id]["submissions"] = weekly["data"][discord_id].get("submissions", 0) + 1
-    
-    # Only count as unique problem if it's truly new (not a re-solve)
-    if is_new_problem:
-        # Check if problem already counted this week (unique problems)
-        existing_slugs = [p.get("titleSlug") for p in weekly["data"][discord_id]["problems"]]
-        if title_slug not in existing_slugs:
-            weekly["data"][discord_id]["unique_problems"] = weekly["data"][discord_id].get("unique_problems", 0) + 1
-            # Keep backward compatibility with old 'count' field
-            weekly["data"][discord_id]["count"] = weekly["data"][discord_id]["unique_problems"]
-            weekly["data"][discord_id]["problems"].append({
-                "title": problem_title,
-                "titleSlug": title_slug,
-                "questionNo": question_no,
-                "difficulty": difficulty
-            })
+        # Always increment submissions count (even for re-solves)
+        weekly["data"][discord_id]["submissions"] = weekly["data"][discord_id].get("submissions", 0) + 1
+    
+        # Only count as unique problem if it's truly new (not a re-solve)
+        if is_new_problem:
+            # Check if problem already counted this week (unique problems)
+            existing_slugs = [p.get("titleSlug") for p in weekly["data"][discord_id]["problems"]]
+            if title_slug not in existing_slugs:
+                weekly["data"][discord_id]["unique_problems"] = weekly["data"][discord_id].get("unique_problems", 0) + 1
+                # Keep backward compatibility with old 'count' field
+                weekly["data"][discord_id]["count"] = weekly["data"][discord_id]["unique_problems"]
+                weekly["data"][discord_id]["problems"].append({
+                    "title": problem_title,
+                    "titleSlug": title_slug,
+                    "questionNo": question_no,
+                    "difficulty": difficulty
+                })
             
-            # Update difficulty counts
-            diff_lower = difficulty.lower()
-            if diff_lower in ["easy", "medium", "hard"]:
-                weekly["data"][discord_id][diff_lower] += 1
+                # Update difficulty counts
+                diff_lower = difficulty.lower()
+                if diff_lower in ["easy", "medium", "hard"]:
+                    weekly["data"][discord_id][diff_lower] += 1
+    
+        if MONGO_AVAILABLE:
+            collection = get_weekly_collection()
+            if collection is not None:
+                # Only touch this user's entry so concurrent workers don't overwrite each other
+                collection.update_one(
+                    {"_id": "weekly_data"},
+                    {"$set": {
+                        f"data.{discord_id}": weekly["data"][discord_id],
+                        "week_start": weekly.get("week_start")
+                    }},
+                    upsert=True
+                )
+                with open(WEEKLY_PATH, "w") as f:
+                    json.dump(weekly, f, indent=4)
+                return weekly
+    
+        save_weekly(weekly)
+        return weekly
+
+# ============== OUTBOX ==============
+
+def _load_outbox_file():
+    if not os.path.exists(OUTBOX_PATH):
+        return []
+    try:
+        with open(OUTBOX_PATH, "r") as f:
+            content = f.read().strip()
+            if not content:
+                return []
+            return json.loads(content)
+    except (json.JSONDecodeError, Exception):
+        return []
+
+def _save_outbox_file(items):
+    with open(OUTBOX_PATH, "w") as f:
+        json.dump(items, f, indent=4)
+
+@traced("storage.enqueue_outbox")
+def enqueue_outbox(channel_id, content):
+    """Persist a message to be sent to a channel; returns the item ID"""
+    now = time.time()
+    item = {
+        "_id": uuid.uuid4().hex,
+        "channel_id": channel_id,
+        "content": content,
+        "status": "pending",
+        "attempts": 0,
+        "created_at": now,
+        "next_attempt_at": now,
+        "claimed_by": None,
+        "claimed_until": 0
+    }
     
-    save_weekly(weekly)
-    return weekly
+    if MONGO_AVAILABLE:
+        collection = get_outbox_collection()
+        if collection is not None:
+            collection.insert_one(dict(item))
+            return item["_id"]
+    
+    with _outbox_file_lock:
+        items = _load_outbox_file()
+        items.append(item)
+        _save_outbox_file(items)
+    return item["_id"]
+
+def _first_due_per_channel(pending, now, limit):
+    """Due items from oldest-first pending items, stopping each channel at its first item that isn't due.
+
+    An item waiting on a retry (or claimed by another send) blocks everything
+    queued after it for the same channel, so messages never overtake each other.
+    """
+    blocked = set()
+    due = []
+    for item in pending:
+        channel_id = item["channel_id"]
+        if channel_id in blocked:
+            continue
+        if item["next_attempt_at"] > now or item.get("claimed_until", 0) >= now:
+            blocked.add(channel_id)
+            continue
+        due.append(item)
+        if len(due) >= limit:
+            break
+    return due
+
+@traced("storage.claim_due_outbox")
+def claim_due_outbox(worker_id, claim_ttl, limit=50):
+    """Claim up to `limit` due pending items (oldest first) so only this worker sends them"""
+    now = time.time()
+    due_filter = {
+        "status": "pending",
+        "next_attempt_at": {"$lte": now},
+        "claimed_until": {"$lt": now}
+    }
+    claim = {"claimed_by": worker_id, "claimed_until": now + claim_ttl}
+    
+    if MONGO_AVAILABLE:
+        collection = get_outbox_collection()
+        if collection is not None:
+            pending = collection.find(
+                {"status": "pending"},
+                {"channel_id": 1, "next_attempt_at": 1, "claimed_until": 1},
+                sort=[("created_at", 1)]
+            )
+            claimed = []
+            lost = set()
+            for candidate in _first_due_per_channel(pending, now, limit):
+                if candidate["channel_id"] in lost:
+                    continue
+                doc = collection.find_one_and_update(
+                    {"_id": candidate["_id"], **due_filter},
+                    {"$set": claim},
+                    return_document=ReturnDocument.AFTER
+                )
+                if doc is None:
+                    # Another worker claimed it since the scan; leave the rest of its channel to them
+                    lost.add(candidate["channel_id"])
+                    continue
+                claimed.append(doc)
+            return claimed
+    
+    with _outbox_file_lock:
+        items = _load_outbox_file()
+        pending = sorted((item for item in items if item["status"] == "pending"), key=lambda item: item["created_at"])
+        due = _first_due_per_channel(pending, now, limit)
+        for item in due:
+            item.update(claim)
+        if due:
+            _save_outbox_file(items)
+    return [dict(item) for item in due]
+
+@traced("storage.complete_outbox_item")
+def complete_outbox_item(item_id):
+    """Acknowledge an item once Discord confirmed the send"""
+    if MONGO_AVAILABLE:
+        collection = get_outbox_collection()
+        if collection is not None:
+            collection.delete_one({"_id": item_id})
+            return
+    
+    with _outbox_file_lock:
+        items = [item for item in _load_outbox_file() if item["_id"] != item_id]
+        _save_outbox_file(items)
+
+@traced("storage.retry_outbox_item")
+def retry_outbox_item(item_id, attempts, next_attempt_at, error, dead=False):
+    """Record a failed send; the item is retried at `next_attempt_at` unless dead"""
+    update = {
+        "status": "dead" if dead else "pending",
+        "attempts": attempts,
+        "next_attempt_at": next_attempt_at,
+        "last_error": str(error)[:500],
+        "claimed_by": None,
+        "claimed_until": 0
+    }
+    
+    if MONGO_AVAILABLE:
+        collection = get_outbox_collection()
+        if collection is not None:
+            collection.update_one({"_id": item_id}, {"$set": update})
+            return
+    
+    with _outbox_file_lock:
+        items = _load_outbox_file()
+        for item in items:
+            if item["_id"] == item_id:
+                item.update(update)
+        _save_outbox_file(items)
+
+@traced("storage.count_pending_outbox")
+def count_pending_outbox():
+    """Number of messages still waiting to be sent"""
+    if MONGO_AVAILABLE:
+        collection = get_outbox_collection()
+        if collection is not None:
+            return collection.count_documents({"status": "pending"})
+    
+    with _outbox_file_lock:
+        return sum(1 for item in _load_outbox_file() if item["status"] == "pending")
+
+# ============== WORKERS ==============
+
+def heartbeat_worker(worker_id):
+    """Record that a polling worker is alive"""
+    if MONGO_AVAILABLE:
+        collection = get_workers_collection()
+        if collection is not None:
+            collection.replace_one(
+                {"_id": worker_id},
+                {"_id": worker_id, "last_seen": time.time()},
+                upsert=True
+            )
+
+def load_live_workers(worker_id, ttl):
+    """Return IDs of workers that sent a heartbeat within `ttl` seconds.
+    
+    Without MongoDB there is nothing shared to coordinate through, so the
+    current process is the only worker.
+    """
+    if MONGO_AVAILABLE:
+        collection = get_workers_collection()
+        if collection is not None:
+            cutoff = time.time() - ttl
+            return sorted(doc["_id"] for doc in collection.find({"last_seen": {"$gte": cutoff}}))
+    
+    return [worker_id]
+
+def try_acquire_leader_lock(worker_id, ttl):
+    """Take or renew the leader lock document. Returns True if this worker is leader."""
+    if MONGO_AVAILABLE:
+        collection = get_locks_collection()
+        if collection is not None:
+            now = time.time()
+            try:
+                doc = collection.find_one_and_update(
+                    {
+                        "_id": "leader",
+                        "$or": [{"holder": worker_id}, {"expires_at": {"$lt": now}}]
+                    },
+                    {"$set": {"holder": worker_id, "expires_at": now + ttl}},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+            except DuplicateKeyError:
+                # Lock exists and is held by another live worker
+                return False
+            return doc is not None and doc.get("holder") == worker_id
+    
+    return True
+
+def release_leader_lock(worker_id):
+    """Give up the leader lock if this worker holds it"""
+    if MONGO_AVAILABLE:
+        collection = get_locks_collection()
+        if collection is not None:
+            collection.delete_one({"_id": "leader", "holder": worker_id})
 
 # ============== HELPERS ==============
 
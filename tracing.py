@@ -0,0 +1,164 @@
+"""
+Tracing module - nested timing spans for jobs, commands and the calls they make
+
+A span opened inside another (in the same task, or in a thread started with
+asyncio.to_thread) becomes its child. Finished spans are written as JSON lines
+to TRACE_LOG_PATH and kept in memory for the !perf command. Writes go through a
+queue to a background thread, so ending a span never waits on the disk (or on a
+log rotation), even on the event loop.
+"""
+import os
+import json
+import queue
+import atexit
+import time
+import uuid
+import logging
+import functools
+import inspect
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", "traces.jsonl")
+TRACE_LOG_MAX_BYTES = 5 * 1024 * 1024
+TRACE_LOG_BACKUPS = 2
+RECENT_SPANS = 5000
+
+_current_span = contextvars.ContextVar("trace_span", default=None)
+_recent = deque(maxlen=RECENT_SPANS)
+_recent_lock = threading.Lock()
+
+_trace_logger = logging.getLogger("leettogether.trace")
+_trace_logger.setLevel(logging.INFO)
+_trace_logger.propagate = False
+if not _trace_logger.handlers:
+    _trace_handler = RotatingFileHandler(
+        TRACE_LOG_PATH, maxBytes=TRACE_LOG_MAX_BYTES, backupCount=TRACE_LOG_BACKUPS, encoding="utf-8"
+    )
+    _trace_handler.setFormatter(logging.Formatter("%(message)s"))
+    _trace_queue = queue.SimpleQueue()
+    _trace_listener = QueueListener(_trace_queue, _trace_handler)
+    _trace_listener.start()
+    # Flush queued spans on exit
+    atexit.register(_trace_listener.stop)
+    _trace_logger.addHandler(QueueHandler(_trace_queue))
+
+
+class Span:
+    """One timed operation; attrs are free-form details such as the user or query"""
+
+    def __init__(self, name, attrs, parent):
+        self.name = name
+        self.attrs = attrs
+        self.span_id = uuid.uuid4().hex[:16]
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self.duration = None
+        self.error = None
+        self._token = None
+
+    def to_record(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 3),
+            "duration_ms": round(self.duration * 1000, 2),
+            "error": self.error,
+            **({"attrs": self.attrs} if self.attrs else {}),
+        }
+
+
+def start_span(name, **attrs):
+    """Open a span as a child of the current one; close it with end_span in the same task/thread"""
+    span = Span(name, attrs, _current_span.get())
+    span._token = _current_span.set(span)
+    return span
+
+
+def end_span(span, error=None):
+    span.duration = time.perf_counter() - span._started
+    if isinstance(error, BaseException):
+        span.error = f"{type(error).__name__}: {error}"
+    elif error is not None:
+        span.error = str(error)
+    if span._token is not None:
+        _current_span.reset(span._token)
+        span._token = None
+
+    record = span.to_record()
+    with _recent_lock:
+        _recent.append(record)
+    try:
+        _trace_logger.info(json.dumps(record, default=str))
+    except Exception as e:
+        print(f"Failed to write trace span {span.name}: {e}")
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time the enclosed block as a span"""
+    current = start_span(name, **attrs)
+    try:
+        yield current
+    except BaseException as e:
+        end_span(current, e)
+        raise
+    else:
+        end_span(current)
+
+
+def traced(name=None):
+    """Decorate a function (sync or async) so every call is recorded as a span"""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_recent_spans(since_seconds=None):
+    """Finished spans kept in memory, oldest first"""
+    with _recent_lock:
+        spans = list(_recent)
+    if since_seconds is not None:
+        cutoff = time.time() - since_seconds
+        spans = [s for s in spans if s["start"] >= cutoff]
+    return spans
+
+
+def summarize_spans(spans):
+    """Per span name: count, p50, p95 and max duration in ms, slowest p95 first"""
+    by_name = {}
+    for s in spans:
+        by_name.setdefault(s["name"], []).append(s["duration_ms"])
+
+    summary = []
+    for name, durations in by_name.items():
+        durations.sort()
+        summary.append({
+            "name": name,
+            "count": len(durations),
+            "p50_ms": durations[len(durations) // 2],
+            "p95_ms": durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+            "max_ms": durations[-1],
+        })
+    summary.sort(key=lambda s: s["p95_ms"], reverse=True)
+    return summary
@@ -1,17 +1,59 @@
-from flask import Flask
-from threading import Thread
+"""
+Webserver module - keep-alive, health, metrics and read-only API on the bot's event loop
+
+Runs on aiohttp (already installed with discord.py) inside the bot's own loop,
+so handlers read in-memory bot state directly instead of from another thread.
+Handlers must not block: anything that touches storage goes through
+asyncio.to_thread. Other modules add endpoints with @webserver.routes.get(...)
+before start() is called.
+"""
 import os
+import asyncio
+from aiohttp import web
+from metrics import render_metrics
+from health import health_report
+
+routes = web.RouteTableDef()
+
+
+@routes.get('/')
+async def home(request):
+    return web.Response(text="LeetTogether Bot is running! 🚀")
+
 
-app = Flask('')
+@routes.get('/metrics')
+async def metrics(request):
+    # Some gauges (e.g. the outbox backlog) query storage, so render off the loop
+    body = await asyncio.to_thread(render_metrics)
+    return web.Response(
+        body=body.encode("utf-8"), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+    )
 
-@app.route('/')
-def home():
-    return "LeetTogether Bot is running! 🚀"
 
-def run():
+@routes.get('/healthz')
+async def healthz(request):
+    # Liveness: fails only when the bot is wedged and a restart would help
+    healthy, body = health_report(readiness=False)
+    return web.json_response(body, status=200 if healthy else 503)
+
+
+@routes.get('/readyz')
+async def readyz(request):
+    healthy, body = health_report(readiness=True)
+    return web.json_response(body, status=200 if healthy else 503)
+
+
+async def start():
+    """Start serving on PORT in the running loop; returns the runner for stop()"""
+    app = web.Application()
+    app.add_routes(routes)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
     port = int(os.environ.get("PORT", 8080))
-    app.run(host="0.0.0.0", port=port)
+    await web.TCPSite(runner, host="0.0.0.0", port=port).start()
+    print(f"Webserver listening on port {port}")
+    return runner
+
 
-def keep_alive():
-    t = Thread(target=run, daemon=True)
-    t.start()
\ No newline at end of file
+async def stop(runner):
+    await runner.cleanup()